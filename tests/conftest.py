@@ -37,3 +37,12 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Картинки, которые mixer создаёт для ImageField, — во временный каталог."""
+    settings.MEDIA_ROOT = str(tmp_path)
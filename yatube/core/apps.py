@@ -1,5 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db import configure_connection
+
+        connection_created.connect(configure_connection,
+                                   dispatch_uid='core.db.configure')
+        if settings.DEFERRED_FIELD_GUARD:
+            from . import deferred
+            deferred.install()
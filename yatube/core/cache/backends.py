@@ -0,0 +1,256 @@
+"""Бэкенды кэша: общий Redis и двухуровневый L1 + L2.
+
+RedisCache хранит целые числа строкой, чтобы INCRBY работал на сервере,
+а остальные значения — pickle. TieredCache держит горячие ключи в
+локальном кэше процесса с коротким таймаутом, а источником правды
+остаётся общий кэш.
+"""
+import pickle
+import threading
+
+import redis
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# INCRBY создал бы отсутствующий ключ, а Django ждёт ValueError;
+# проверка и увеличение в одном скрипте не разрываются чужой командой
+INCR_EXISTING = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+return false
+"""
+
+
+def get_pool(location, max_connections, timeout, **kwargs):
+    """Пул на адрес сервера и настройки, общий для потоков процесса.
+
+    Django 2.2 создаёт объект кэша в каждом потоке, поэтому пул живёт
+    здесь, а не в RedisCache. После fork redis-py сам заводит новый.
+    """
+    # алиасы с одним сервером, но разными OPTIONS получают разные пулы
+    key = (location, max_connections, timeout, frozenset(kwargs.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = redis.BlockingConnectionPool.from_url(
+                location,
+                max_connections=max_connections,
+                timeout=timeout,
+                socket_timeout=timeout,
+                socket_connect_timeout=timeout,
+                **kwargs
+            )
+        return _pools[key]
+
+
+class RedisCache(BaseCache):
+    """Кэш на сервере Redis через redis-py.
+
+    OPTIONS: MAX_CONNECTIONS — размер пула на процесс,
+    SOCKET_TIMEOUT — таймаут соединения и ожидания свободного слота,
+    CONNECTION_POOL_KWARGS — прочие аргументы пула redis-py.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._client = redis.Redis(connection_pool=get_pool(
+            server,
+            max_connections=options.get('MAX_CONNECTIONS', 50),
+            timeout=options.get('SOCKET_TIMEOUT', 1.0),
+            **options.get('CONNECTION_POOL_KWARGS', {})
+        ))
+        self._incr = self._client.register_script(INCR_EXISTING)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expire_ms(self, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return None if timeout is None else int(timeout * 1000)
+
+    def _dump(self, value):
+        if type(value) is int:
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _load(self, raw):
+        if raw is None:
+            return None
+        # pickle всегда начинается с байта PROTO, а число — с цифры или '-'
+        if raw[:1] == b'\x80':
+            return pickle.loads(raw)
+        return int(raw)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        expire = self._expire_ms(timeout)
+        if expire is not None and expire <= 0:
+            return False
+        return bool(self._client.set(self._key(key, version),
+                                     self._dump(value), px=expire, nx=True))
+
+    def get(self, key, default=None, version=None):
+        raw = self._client.get(self._key(key, version))
+        return default if raw is None else self._load(raw)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expire = self._expire_ms(timeout)
+        if expire is not None and expire <= 0:
+            self._client.delete(key)
+        else:
+            self._client.set(key, self._dump(value), px=expire)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expire = self._expire_ms(timeout)
+        if expire is None:
+            exists, _ = self._client.pipeline().exists(key).persist(
+                key).execute()
+            return exists == 1
+        return self._client.pexpire(key, max(expire, 1))
+
+    def delete(self, key, version=None):
+        return self._client.delete(self._key(key, version)) == 1
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._client.mget([self._key(key, version) for key in keys])
+        return {
+            key: self._load(raw)
+            for key, raw in zip(keys, values) if raw is not None
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        expire = self._expire_ms(timeout)
+        if expire is not None and expire <= 0:
+            self.delete_many(data, version)
+            return []
+        pipeline = self._client.pipeline(transaction=False)
+        for key, value in data.items():
+            pipeline.set(self._key(key, version), self._dump(value),
+                         px=expire)
+        pipeline.execute()
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._client.delete(*keys)
+
+    def has_key(self, key, version=None):
+        return self._client.exists(self._key(key, version)) == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        try:
+            value = self._incr(keys=[key], args=[delta])
+        except redis.ResponseError as error:
+            raise ValueError(str(error))
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def clear(self):
+        self._client.flushdb()
+
+
+class TieredCache(BaseCache):
+    """L1 в памяти процесса поверх общего L2.
+
+    OPTIONS: L1 и L2 — алиасы из CACHES, L1_TIMEOUT — сколько секунд
+    процесс может не видеть чужую запись. Удаление и incr сбрасывают L1
+    только в своём процессе, поэтому L1_TIMEOUT должен быть коротким.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l1_alias = options.get('L1', 'local')
+        self._l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+
+    @property
+    def l1(self):
+        return caches[self._l1_alias]
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _l1_timeout(self, timeout):
+        if timeout == DEFAULT_TIMEOUT or timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version)
+        if added:
+            self.l1.set(key, value, self._l1_timeout(timeout), version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        value = self.l1.get(key, _MISSING, version)
+        if value is not _MISSING:
+            return value
+        value = self.l2.get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        self.l1.set(key, value, self.l1_timeout, version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version)
+        self.l1.set(key, value, self._l1_timeout(timeout), version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.delete(key, version)
+        return self.l2.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(key, version)
+        return self.l2.delete(key, version)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.l1.get_many(keys, version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            fetched = self.l2.get_many(missing, version)
+            self.l1.set_many(fetched, self.l1_timeout, version)
+            found.update(fetched)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version)
+        self.l1.set_many(data, self._l1_timeout(timeout), version)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.l1.delete_many(keys, version)
+        self.l2.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return (self.l1.has_key(key, version)
+                or self.l2.has_key(key, version))
+
+    def incr(self, key, delta=1, version=None):
+        self.l1.delete(key, version)
+        return self.l2.incr(key, delta, version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
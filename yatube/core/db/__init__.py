@@ -0,0 +1,21 @@
+"""Настройка новых соединений с базой.
+
+SQLite по умолчанию ведёт rollback-журнал: пока писатель фиксирует
+транзакцию, читатели ждут, а писатель ждёт, пока читатели отпустят файл.
+configure_connection выполняет PRAGMA из SQLITE_PRAGMAS на каждом новом
+соединении: WAL (чтение и запись не блокируют друг друга),
+synchronous=NORMAL (в WAL fsync только на контрольной точке) и mmap
+(страницы читаются без копирования в кэш процесса).
+"""
+from django.conf import settings
+
+
+def apply_pragmas(connection, pragmas):
+    # мимо курсора Django: PRAGMA не попадают в счётчики запросов
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,127 @@
+"""PostgreSQL с пулом соединений на процесс.
+
+Django 2.2 открывает соединение в каждом потоке и закрывает его в конце
+запроса или по истечении CONN_MAX_AGE. Здесь новое соединение берётся
+из пула, а закрытие возвращает его туда же: воркер не платит за TCP и
+аутентификацию на каждом запросе и держит не больше POOL_MAX_SIZE
+соединений. Когда все заняты, поток ждёт освобождения до POOL_TIMEOUT
+секунд. Свободные соединения не закрываются, пока живёт процесс.
+
+OPTIONS: POOL_MAX_SIZE, POOL_TIMEOUT; остальное уходит в psycopg2.connect.
+"""
+import os
+import threading
+import time
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+Database = base.Database
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Database.OperationalError):
+    """Все соединения пула заняты дольше POOL_TIMEOUT."""
+
+
+class ConnectionPool:
+    def __init__(self, conn_params, max_size, timeout):
+        self.conn_params = conn_params
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle = []
+        # открытые соединения, и свободные, и выданные
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def get(self):
+        """Свободное соединение, новое или дождавшееся возврата."""
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                left = deadline - time.monotonic()
+                if left <= 0 or not self.condition.wait(left):
+                    raise PoolTimeout(
+                        f'Все {self.max_size} соединений заняты дольше '
+                        f'{self.timeout} с'
+                    )
+            if self.idle:
+                # последнее возвращённое: его кэши на сервере ещё горячие
+                return self.idle.pop()
+            self.size += 1
+        try:
+            return Database.connect(**self.conn_params)
+        except Exception:
+            self._release_slot()
+            raise
+
+    def put(self, connection):
+        """Возвращает соединение; оборванное закрывается и освобождает место.
+
+        Незавершённая транзакция откатывается, чтобы следующий поток не
+        получил чужие блокировки.
+        """
+        usable = not connection.closed
+        if usable:
+            status = connection.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                usable = False
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except Database.Error:
+                    usable = False
+        if not usable:
+            try:
+                connection.close()
+            except Database.Error:
+                pass
+            self._release_slot()
+            return
+        with self.condition:
+            self.idle.append(connection)
+            self.condition.notify()
+
+    def _release_slot(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+
+def get_pool(alias, conn_params, max_size, timeout):
+    """Пул на псевдоним базы; после fork процесс заводит свой."""
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(conn_params, max_size, timeout)
+        return _pools[key]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        self.pool_max_size = conn_params.pop('POOL_MAX_SIZE', 20)
+        self.pool_timeout = conn_params.pop('POOL_TIMEOUT', 10)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, conn_params,
+                             self.pool_max_size, self.pool_timeout)
+        connection = self.pool.get()
+        # как в базовом классе: уровень изоляции до включения autocommit
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.put(self.connection)
@@ -0,0 +1,155 @@
+"""Блокировки SQLite при одновременном чтении и записи.
+
+contention() создаёт временный файл базы с постами и комментариями и
+гоняет по нему потоки: читатели выбирают страницу ленты, писатели в
+транзакции добавляют комментарий и увеличивают счётчик поста, как
+Comment.save. Прогон повторяется со SQLITE_PRAGMAS из настроек и с
+умолчаниями SQLite (rollback-журнал, synchronous=FULL). С
+rollback-журналом фиксация писателя ждёт, пока читатели отпустят файл, а
+читатели ждут фиксацию; в WAL читатель видит последний снимок и не ждёт.
+Соединения открываются через Django, поэтому работает и хук core.db.
+"""
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import override_settings
+
+ROLLBACK_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+SCHEMA = (
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT NOT NULL, '
+    'created REAL NOT NULL, comment_count INTEGER NOT NULL DEFAULT 0)',
+    'CREATE INDEX post_created ON post (created)',
+    'CREATE TABLE comment (id INTEGER PRIMARY KEY, '
+    'post_id INTEGER NOT NULL, text TEXT NOT NULL, created REAL NOT NULL)',
+)
+READ_PAGE = ('SELECT id, text, created, comment_count FROM post '
+             'ORDER BY created DESC LIMIT %s OFFSET %s')
+ADD_COMMENT = ('INSERT INTO comment (post_id, text, created) '
+               'VALUES (%s, %s, %s)')
+COUNT_COMMENT = ('UPDATE post SET comment_count = comment_count + 1 '
+                 'WHERE id = %s')
+PER_PAGE = 10
+
+
+def _handler(path, timeout):
+    return ConnectionHandler({DEFAULT_DB_ALIAS: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {'timeout': timeout},
+    }})
+
+
+def _seed(handler, posts):
+    connection = handler[DEFAULT_DB_ALIAS]
+    with connection.cursor() as cursor:
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        now = time.time()
+        cursor.executemany(
+            'INSERT INTO post (text, created) VALUES (%s, %s)',
+            [(f'Пост {number} ' * 20, now - number)
+             for number in range(posts)],
+        )
+    connection.close()
+
+
+def _read(cursor, rnd, posts):
+    cursor.execute(READ_PAGE, [PER_PAGE, rnd.randrange(posts - PER_PAGE)])
+    cursor.fetchall()
+
+
+def _write(cursor, rnd, posts):
+    post_id = rnd.randint(1, posts)
+    cursor.execute('BEGIN')
+    try:
+        cursor.execute(ADD_COMMENT, [post_id, 'Комментарий', time.time()])
+        cursor.execute(COUNT_COMMENT, [post_id])
+    except Exception:
+        cursor.execute('ROLLBACK')
+        raise
+    cursor.execute('COMMIT')
+
+
+def _drive(handler, operation, deadline, posts, seed, results):
+    rnd = random.Random(seed)
+    connection = handler[DEFAULT_DB_ALIAS]
+    samples, errors = [], 0
+    try:
+        with connection.cursor() as cursor:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    operation(cursor, rnd, posts)
+                except OperationalError:
+                    errors += 1
+                    continue
+                samples.append(time.perf_counter() - start)
+    finally:
+        connection.close()
+    results.append((operation, samples, errors))
+
+
+def _summary(samples, errors, duration):
+    ordered = sorted(samples)
+
+    def ms(q):
+        if not ordered:
+            return None
+        return round(ordered[min(int(len(ordered) * q),
+                                 len(ordered) - 1)] * 1000, 2)
+
+    return {
+        'ops': len(ordered),
+        'ops_per_s': round(len(ordered) / duration, 1),
+        'p50_ms': ms(0.5),
+        'p95_ms': ms(0.95),
+        'max_ms': ms(1),
+        'errors': errors,
+    }
+
+
+def run_mode(pragmas, readers=4, writers=2, duration=5, posts=2000,
+             timeout=5):
+    """Один прогон на свежем файле базы с заданными PRAGMA."""
+    directory = tempfile.mkdtemp()
+    try:
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            handler = _handler(os.path.join(directory, 'bench.sqlite3'),
+                               timeout)
+            _seed(handler, posts)
+            deadline = time.monotonic() + duration
+            results = []
+            threads = [
+                threading.Thread(target=_drive, args=(
+                    handler, operation, deadline, posts, seed, results))
+                for seed, operation in enumerate(
+                    [_read] * readers + [_write] * writers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    report = {}
+    for name, operation in (('read', _read), ('write', _write)):
+        samples = [sample for op, rows, _ in results if op is operation
+                   for sample in rows]
+        errors = sum(count for op, _, count in results if op is operation)
+        report[name] = _summary(samples, errors, duration)
+    return report
+
+
+def contention(modes=None, **options):
+    """Отчёт по наборам PRAGMA, пригодный для json.dump."""
+    modes = modes or {'rollback': ROLLBACK_PRAGMAS,
+                      'configured': settings.SQLITE_PRAGMAS}
+    return {name: dict(run_mode(pragmas, **options), pragmas=pragmas)
+            for name, pragmas in modes.items()}
@@ -0,0 +1,55 @@
+"""Защита от неявной догрузки отложенных полей.
+
+Ленты выбирают колонки через only(). Если шаблон обратится к полю вне
+проекции, Django молча догрузит его отдельным запросом на каждую строку.
+При DEFERRED_FIELD_GUARD такое обращение бросает DeferredFieldAccess,
+и N+1 виден сразу в разработке и в тестах, а не на графике нагрузки.
+"""
+from django.db.models.fields.files import FileDescriptor
+from django.db.models.query_utils import DeferredAttribute
+
+
+class DeferredFieldAccess(Exception):
+    """Чтение поля, не выбранного в only()/defer().
+
+    Не AttributeError: шаблон и hasattr() молча проглотили бы его.
+    """
+
+
+_originals = {}
+
+
+def _fail(instance, name):
+    raise DeferredFieldAccess(
+        f'{type(instance).__name__}.{name} не выбрано в only() и '
+        f'догрузилось бы отдельным запросом'
+    )
+
+
+def _guarded_deferred_get(self, instance, cls=None):
+    # дескриптор не перекрывает __dict__: сюда попадают только
+    # незагруженные поля
+    if instance is not None and self.field_name not in instance.__dict__:
+        _fail(instance, self.field_name)
+    return _originals[DeferredAttribute](self, instance, cls)
+
+
+def _guarded_file_get(self, instance, cls=None):
+    if instance is not None and self.field.name not in instance.__dict__:
+        _fail(instance, self.field.name)
+    return _originals[FileDescriptor](self, instance, cls)
+
+
+def install():
+    if _originals:
+        return
+    _originals[DeferredAttribute] = DeferredAttribute.__get__
+    _originals[FileDescriptor] = FileDescriptor.__get__
+    DeferredAttribute.__get__ = _guarded_deferred_get
+    FileDescriptor.__get__ = _guarded_file_get
+
+
+def uninstall():
+    for descriptor, get in _originals.items():
+        descriptor.__get__ = get
+    _originals.clear()
@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.db import bench
+
+
+class Command(BaseCommand):
+    help = ('Гоняет читателей и писателей по временной базе SQLite со '
+            'SQLITE_PRAGMAS и с rollback-журналом и сравнивает задержки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5,
+                            help='Секунд на каждый режим.')
+        parser.add_argument('--output',
+                            help='Записать отчёт в JSON-файл.')
+
+    def handle(self, *args, **options):
+        report = bench.contention(readers=options['readers'],
+                                  writers=options['writers'],
+                                  duration=options['duration'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2)
+        for mode, row in report.items():
+            for kind in ('read', 'write'):
+                stats = row[kind]
+                self.stdout.write(
+                    f'{mode:<10} {kind:<5} {stats["ops_per_s"]:>9} оп/с  '
+                    f'p50 {stats["p50_ms"]} мс  p95 {stats["p95_ms"]} мс  '
+                    f'max {stats["max_ms"]} мс  ошибок {stats["errors"]}'
+                )
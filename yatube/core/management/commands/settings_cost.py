@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.profiles import startup_cost
+from yatube.settings import PROFILES
+
+
+class Command(BaseCommand):
+    help = ('Замеряет в отдельных процессах импорт настроек и '
+            'django.setup() для каждого профиля YATUBE_ENV.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', choices=PROFILES,
+                            help='Профиль; по умолчанию все.')
+        parser.add_argument('--runs', type=int, default=3,
+                            help='Запусков на профиль (берётся медиана).')
+
+    def handle(self, *args, **options):
+        for profile in options['profile'] or PROFILES:
+            cost = startup_cost(profile, options['runs'])
+            self.stdout.write(
+                f'{profile:<6} настройки {cost["settings_ms"]:7.1f} мс  '
+                f'setup {cost["setup_ms"]:7.1f} мс  '
+                f'модулей {cost["modules"]:.0f}  '
+                f'приложений {cost["apps"]:.0f}'
+            )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.templating import warm_up
+
+
+class Command(BaseCommand):
+    help = ('Разбирает все шаблоны templates/ и печатает время разбора '
+            'каждого, самые медленные первыми.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int,
+                            help='Показать только столько шаблонов.')
+
+    def handle(self, *args, **options):
+        timings = warm_up()
+        broken = [name for name, seconds in timings if seconds is None]
+        parsed = sorted(
+            ((name, seconds) for name, seconds in timings
+             if seconds is not None),
+            key=lambda item: item[1], reverse=True,
+        )
+        for name, seconds in parsed[:options['top']]:
+            self.stdout.write(f'{seconds * 1000:>9.2f} мс  {name}')
+        total = sum(seconds for _, seconds in parsed)
+        self.stdout.write(self.style.SUCCESS(
+            f'Шаблонов: {len(parsed)}, разбор {total * 1000:.1f} мс'
+        ))
+        if broken:
+            raise CommandError(f'Не разобраны: {", ".join(broken)}')
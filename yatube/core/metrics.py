@@ -0,0 +1,170 @@
+"""Метрики запроса: SQL, рендеринг шаблонов и обращения к кэшу.
+
+Сборщик текущего запроса лежит в ContextVar. SQL считается через
+connection.execute_wrapper, а для шаблонов и кэша один раз оборачиваются
+Template.render и методы get и get_many используемых бэкендов кэша.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from django.core.cache import caches
+from django.template.base import Template
+
+current = ContextVar('request_metrics', default=None)
+
+_MISSING = object()
+_instrumented = set()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._template_depth = 0
+        self._cache_depth = 0
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 3),
+            'template_ms': round(self.template_time * 1000, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def _instrument_templates():
+    render = Template.render
+
+    def timed_render(self, context):
+        metrics = current.get()
+        if metrics is None:
+            return render(self, context)
+        # include вызывает render вложенно, время считаем по внешнему
+        metrics._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics._template_depth -= 1
+            if not metrics._template_depth:
+                metrics.template_time += time.perf_counter() - start
+
+    Template.render = timed_render
+
+
+def _counted(metrics, method, *args):
+    """Вызов метода кэша и признак внешнего вызова.
+
+    Двухуровневый кэш зовёт методы своих уровней, а get_many в BaseCache —
+    get на каждый ключ: считается только внешний вызов.
+    """
+    outer = not metrics._cache_depth
+    metrics._cache_depth += 1
+    try:
+        return method(*args), outer
+    finally:
+        metrics._cache_depth -= 1
+
+
+def _instrument_get(backend_class):
+    get = backend_class.get
+
+    def counted_get(self, key, default=None, version=None):
+        metrics = current.get()
+        if metrics is None:
+            return get(self, key, default, version)
+        value, outer = _counted(metrics, get, self, key, _MISSING, version)
+        if value is _MISSING:
+            if outer:
+                metrics.cache_misses += 1
+            return default
+        if outer:
+            metrics.cache_hits += 1
+        return value
+
+    backend_class.get = counted_get
+
+
+def _instrument_get_many(backend_class):
+    get_many = backend_class.get_many
+
+    def counted_get_many(self, keys, version=None):
+        metrics = current.get()
+        if metrics is None:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        found, outer = _counted(metrics, get_many, self, keys, version)
+        if outer:
+            # по ключу: страница из 10 карточек — 10 обращений, а не одно
+            metrics.cache_hits += len(found)
+            metrics.cache_misses += len(keys) - len(found)
+        return found
+
+    backend_class.get_many = counted_get_many
+
+
+def instrument(cache_aliases):
+    """Однократно оборачивает шаблоны и классы бэкендов кэша."""
+    if Template not in _instrumented:
+        _instrument_templates()
+        _instrumented.add(Template)
+    for alias in cache_aliases:
+        backend_class = type(caches[alias])
+        if backend_class not in _instrumented:
+            _instrument_get(backend_class)
+            _instrument_get_many(backend_class)
+            _instrumented.add(backend_class)
+
+
+def record(view_name, metrics):
+    with _stats_lock:
+        row = _stats.setdefault(view_name, {
+            'requests': 0,
+            'queries': 0,
+            'max_queries': 0,
+            'sql_ms': 0.0,
+            'template_ms': 0.0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+        })
+        row['requests'] += 1
+        row['queries'] += metrics.queries
+        row['max_queries'] = max(row['max_queries'], metrics.queries)
+        row['sql_ms'] += metrics.sql_time * 1000
+        row['template_ms'] += metrics.template_time * 1000
+        row['cache_hits'] += metrics.cache_hits
+        row['cache_misses'] += metrics.cache_misses
+
+
+def snapshot():
+    """Накопленные метрики этого процесса по именам URL."""
+    with _stats_lock:
+        return {
+            view_name: dict(
+                row,
+                avg_queries=round(row['queries'] / row['requests'], 2),
+                sql_ms=round(row['sql_ms'], 3),
+                template_ms=round(row['template_ms'], 3),
+            )
+            for view_name, row in _stats.items()
+        }
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
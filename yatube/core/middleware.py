@@ -0,0 +1,49 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+
+class RequestMetricsMiddleware:
+    """Считает SQL, рендеринг и кэш на запрос и копит их по имени URL.
+
+    Значения отдаются в заголовках X-Query-Count, X-SQL-Time-Ms,
+    X-Template-Time-Ms, X-Cache-Hits, X-Cache-Misses и Server-Timing,
+    а сводка процесса — в представлении core.views.request_metrics.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        metrics.instrument(settings.CACHES)
+
+    def __call__(self, request):
+        collector = metrics.RequestMetrics()
+        token = metrics.current.set(collector)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(collector.sql_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+
+        match = request.resolver_match
+        metrics.record(match.view_name if match else '<unresolved>',
+                       collector)
+        values = collector.as_dict()
+        response['X-Query-Count'] = values['queries']
+        response['X-SQL-Time-Ms'] = values['sql_ms']
+        response['X-Template-Time-Ms'] = values['template_ms']
+        response['X-Cache-Hits'] = values['cache_hits']
+        response['X-Cache-Misses'] = values['cache_misses']
+        response['Server-Timing'] = (
+            f'sql;dur={values["sql_ms"]}, tpl;dur={values["template_ms"]}'
+        )
+        return response
@@ -0,0 +1,49 @@
+"""Стоимость запуска каждого профиля настроек.
+
+Профиль выбирается при импорте yatube.settings, поэтому замер идёт в
+отдельном процессе на профиль: импорт настроек, django.setup() (импорт
+приложений и моделей) и число загруженных модулей. Из запусков берётся
+медиана — первый обычно платит за холодный кэш байткода.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+
+MEASURE = '''
+import json, sys, time
+start = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+loaded = time.perf_counter()
+django.setup(set_prefix=False)
+ready = time.perf_counter()
+print(json.dumps({
+    'settings_ms': (loaded - start) * 1000,
+    'setup_ms': (ready - loaded) * 1000,
+    'modules': len(sys.modules),
+    'apps': len(settings.INSTALLED_APPS),
+}))
+'''
+
+
+def measure(profile):
+    """Один замер профиля в свежем интерпретаторе."""
+    env = dict(os.environ, YATUBE_ENV=profile,
+               DJANGO_SETTINGS_MODULE='yatube.settings')
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE], cwd=settings.BASE_DIR, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def startup_cost(profile, runs=3):
+    """Медианы замеров профиля: settings_ms, setup_ms, modules, apps."""
+    samples = [measure(profile) for _ in range(runs)]
+    return {key: statistics.median(sample[key] for sample in samples)
+            for key in samples[0]}
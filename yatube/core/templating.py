@@ -0,0 +1,48 @@
+"""Прогрев шаблонов при старте воркера.
+
+С кэширующим загрузчиком шаблон разбирается один раз на процесс, но
+первым это делает чей-то запрос. warm_up() заранее загружает все шаблоны
+из каталогов DIRS движка и возвращает время разбора каждого, чтобы первый
+запрос после деплоя не платил за разбор base.html и includes.
+"""
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt', '.xml')
+
+
+def template_names(engine):
+    """Имена шаблонов из DIRS движка относительно своего каталога."""
+    names = []
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(TEMPLATE_SUFFIXES):
+                    path = os.path.join(root, filename)
+                    names.append(os.path.relpath(path, directory)
+                                 .replace(os.sep, '/'))
+    return sorted(set(names))
+
+
+def warm_up(using='django'):
+    """Загружает все шаблоны; [(имя, секунды или None при ошибке)]."""
+    engine = engines[using].engine
+    timings = []
+    for name in template_names(engine):
+        start = time.perf_counter()
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError:
+            logger.exception('Шаблон %s не разобран', name)
+            timings.append((name, None))
+            continue
+        timings.append((name, time.perf_counter() - start))
+    parsed = [seconds for _, seconds in timings if seconds is not None]
+    logger.info('Прогрето шаблонов: %d за %.1f мс', len(parsed),
+                sum(parsed) * 1000)
+    return timings
@@ -0,0 +1,20 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка бюджета SQL-запросов на одно обращение к представлению."""
+
+    def assertQueryBudget(self, client, url, budget, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, data)
+        executed = len(queries)
+        if executed > budget:
+            listing = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(queries, start=1)
+            )
+            self.fail(
+                f'{url}: {executed} запросов при бюджете {budget}\n{listing}'
+            )
+        return response
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from ..cache.backends import RedisCache, get_pool
+
+User = get_user_model()
+
+
+class FakeServerMixin:
+    location = 'redis://fake/0'
+    options = {
+        'MAX_CONNECTIONS': 2,
+        'CONNECTION_POOL_KWARGS': {
+            'connection_class': fakeredis.FakeConnection,
+            'server': fakeredis.FakeServer(),
+        },
+    }
+
+    def tiered_caches(self, l1_timeout=60):
+        return {
+            'default': {
+                'BACKEND': 'core.cache.backends.TieredCache',
+                'OPTIONS': {'L1_TIMEOUT': l1_timeout},
+            },
+            'local': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'l1-{id(self)}',
+            },
+            'shared': {
+                'BACKEND': 'core.cache.backends.RedisCache',
+                'LOCATION': self.location,
+                'OPTIONS': self.options,
+            },
+        }
+
+
+class RedisCacheTests(FakeServerMixin, SimpleTestCase):
+    def setUp(self):
+        self.cache = RedisCache(self.location, {'OPTIONS': self.options})
+        self.cache.clear()
+
+    def test_values_round_trip(self):
+        self.cache.set('number', 42)
+        self.cache.set('object', {'posts': [1, 2]})
+        self.assertEqual(self.cache.get('number'), 42)
+        self.assertEqual(self.cache.get('object'), {'posts': [1, 2]})
+        self.assertEqual(self.cache.get('absent', 'default'), 'default')
+        self.assertEqual(
+            self.cache.get_many(['number', 'object', 'absent']),
+            {'number': 42, 'object': {'posts': [1, 2]}},
+        )
+
+    def test_add_incr_and_delete(self):
+        self.assertTrue(self.cache.add('version', 1, timeout=None))
+        self.assertFalse(self.cache.add('version', 100))
+        self.assertEqual(self.cache.incr('version'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('absent')
+        self.cache.set('pickled', 'текст')
+        with self.assertRaises(ValueError):
+            self.cache.incr('pickled')
+        self.assertTrue(self.cache.delete('version'))
+        self.assertFalse(self.cache.has_key('version'))
+
+    def test_timeouts(self):
+        self.cache.set('gone', 1, timeout=0)
+        self.assertFalse(self.cache.has_key('gone'))
+        self.cache.set_many({'short': 1, 'other': 2}, timeout=0.05)
+        time.sleep(0.1)
+        self.assertEqual(self.cache.get_many(['short', 'other']), {})
+        self.cache.set('kept', 1, timeout=0.05)
+        self.assertTrue(self.cache.touch('kept', None))
+        time.sleep(0.1)
+        self.assertEqual(self.cache.get('kept'), 1)
+
+    def test_incr_is_atomic(self):
+        self.cache.set('counter', 0)
+
+        def worker():
+            # у каждого потока свой объект кэша, как у Django 2.2
+            own = RedisCache(self.location, {'OPTIONS': self.options})
+            for _ in range(50):
+                own.incr('counter')
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_pool_is_shared_and_limited(self):
+        pool = self.cache._client.connection_pool
+
+        def worker():
+            own = RedisCache(self.location, {'OPTIONS': self.options})
+            for number in range(20):
+                own.set(f'key{number}', number)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(len(pool._connections), 2)
+        self.assertEqual(self.cache.get('key19'), 19)
+
+    def test_pool_per_options(self):
+        kwargs = self.options['CONNECTION_POOL_KWARGS']
+        pool = get_pool(self.location, 2, 1.0, **kwargs)
+        self.assertIs(get_pool(self.location, 2, 1.0, **kwargs), pool)
+        wider = get_pool(self.location, 10, 1.0, **kwargs)
+        self.assertIsNot(wider, pool)
+        self.assertEqual(wider.max_connections, 10)
+
+
+class TieredCacheTests(FakeServerMixin, TestCase):
+    def test_l1_serves_hot_keys_until_timeout(self):
+        with override_settings(CACHES=self.tiered_caches(l1_timeout=0.1)):
+            cache.set('hot', 'v1')
+            # запись другого воркера в общий кэш
+            caches['shared'].set('hot', 'v2')
+            self.assertEqual(cache.get('hot'), 'v1')
+            time.sleep(0.15)
+            self.assertEqual(cache.get('hot'), 'v2')
+
+    def test_incr_and_delete_reach_both_levels(self):
+        with override_settings(CACHES=self.tiered_caches()):
+            cache.set('version', 1)
+            self.assertEqual(cache.incr('version'), 2)
+            self.assertEqual(cache.get('version'), 2)
+            cache.delete('version')
+            self.assertIsNone(caches['local'].get('version'))
+            self.assertIsNone(caches['shared'].get('version'))
+
+    def test_views_share_cached_fragments(self):
+        author = User.objects.create_user(username='tiered')
+        Post.objects.create(author=author, text='Общий кэш')
+        with override_settings(CACHES=self.tiered_caches()):
+            cache.clear()
+            client = Client()
+            client.get(reverse('posts:index'))
+            # другой процесс: своего L1 нет, фрагмент приходит из L2
+            caches['local'].clear()
+            Post.objects.filter(author=author).update(text='Изменён')
+            response = client.get(reverse('posts:index'))
+            self.assertContains(response, 'Общий кэш')
+            self.assertGreater(int(response['X-Cache-Hits']), 0)
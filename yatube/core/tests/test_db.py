@@ -0,0 +1,193 @@
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.db import bench
+
+
+class SqlitePragmaTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.path = os.path.join(self.directory, 'pragmas.sqlite3')
+
+    def connect(self, timeout=5):
+        # свой ConnectionHandler — отдельное соединение в том же потоке
+        wrapper = ConnectionHandler({DEFAULT_DB_ALIAS: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': self.path,
+            'OPTIONS': {'timeout': timeout},
+        }})[DEFAULT_DB_ALIAS]
+        self.addCleanup(wrapper.close)
+        return wrapper.cursor()
+
+    def concurrent_commit(self):
+        """Фиксирует запись, пока другое соединение читает снимок."""
+        self.connect().execute('CREATE TABLE post (text TEXT)')
+        reader, writer = self.connect(), self.connect(timeout=0.1)
+        reader.execute('BEGIN')
+        reader.execute('SELECT count(*) FROM post')
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute("INSERT INTO post VALUES ('новый')")
+        # чтение не ждёт незафиксированную запись
+        reader.execute('SELECT count(*) FROM post')
+        self.assertEqual(reader.fetchone()[0], 0)
+        writer.execute('COMMIT')
+        reader.execute('SELECT count(*) FROM post')
+        snapshot = reader.fetchone()[0]
+        reader.execute('COMMIT')
+        return snapshot
+
+    def test_wal_reads_and_writes_do_not_block(self):
+        self.assertEqual(self.concurrent_commit(), 0)
+        reader = self.connect()
+        reader.execute('SELECT count(*) FROM post')
+        self.assertEqual(reader.fetchone()[0], 1)
+
+    def test_rollback_journal_commit_waits_for_readers(self):
+        with override_settings(SQLITE_PRAGMAS=bench.ROLLBACK_PRAGMAS):
+            with self.assertRaisesMessage(OperationalError, 'locked'):
+                self.concurrent_commit()
+
+    def test_new_connection_gets_configured_pragmas(self):
+        wrapper = ConnectionHandler({DEFAULT_DB_ALIAS: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': self.path,
+        }})[DEFAULT_DB_ALIAS]
+        self.addCleanup(wrapper.close)
+        with CaptureQueriesContext(wrapper) as queries:
+            wrapper.ensure_connection()
+        self.assertEqual(len(queries), 0)
+        with wrapper.cursor() as cursor:
+            values = {}
+            for name in settings.SQLITE_PRAGMAS:
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+        # synchronous читается числом: NORMAL = 1
+        self.assertEqual(values, {'journal_mode': 'wal', 'synchronous': 1,
+                                  'mmap_size': 256 * 1024 * 1024})
+
+    def test_default_database_is_sqlite_with_busy_timeout(self):
+        self.assertEqual(connection.vendor, 'sqlite')
+        self.assertEqual(settings.DATABASES['default']['OPTIONS'],
+                         {'timeout': 20})
+
+
+class ContentionBenchTests(SimpleTestCase):
+    def test_contention_reports_reads_and_writes_per_mode(self):
+        report = bench.contention(readers=2, writers=1, duration=0.3,
+                                  posts=100)
+        self.assertEqual(set(report), {'rollback', 'configured'})
+        for row in report.values():
+            for kind in ('read', 'write'):
+                with self.subTest(kind=kind):
+                    self.assertGreater(row[kind]['ops'], 0)
+                    self.assertLessEqual(row[kind]['p50_ms'],
+                                         row[kind]['max_ms'])
+
+    def test_command_prints_both_modes(self):
+        out = StringIO()
+        call_command('bench_db', '--duration', '0.2', stdout=out)
+        modes = [line.split()[0] for line in out.getvalue().splitlines()]
+        self.assertEqual(modes, ['rollback'] * 2 + ['configured'] * 2)
+
+
+try:
+    from psycopg2 import extensions
+except ImportError:
+    extensions = None
+
+
+def fake_connection():
+    connection = mock.Mock(closed=0, isolation_level=1)
+    connection.get_transaction_status.return_value = (
+        extensions.TRANSACTION_STATUS_IDLE
+    )
+    connection.get_parameter_status.return_value = 'UTC'
+    return connection
+
+
+@skipUnless(extensions, 'нужен psycopg2 из requirements-postgres.txt')
+class PostgresPoolTests(SimpleTestCase):
+    def setUp(self):
+        from core.db.backends.postgresql import base
+
+        self.base = base
+        patcher = mock.patch.object(base.Database, 'connect',
+                                    side_effect=lambda **_: fake_connection())
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(base._pools.clear)
+
+    def pool(self, max_size=2, timeout=0.05):
+        return self.base.ConnectionPool({'database': 'yatube'}, max_size,
+                                        timeout)
+
+    def test_returned_connection_is_reused(self):
+        pool = self.pool()
+        first = pool.get()
+        pool.put(first)
+        self.assertIs(pool.get(), first)
+        self.assertEqual(self.connect.call_count, 1)
+
+    def test_idle_connections_stay_open_under_concurrency(self):
+        pool = self.pool(max_size=3)
+        opened = [pool.get() for _ in range(3)]
+        for pooled in opened:
+            pool.put(pooled)
+        self.assertEqual(len(pool.idle), 3)
+        for pooled in opened:
+            pooled.close.assert_not_called()
+
+    def test_open_transaction_is_rolled_back(self):
+        pool = self.pool()
+        connection = pool.get()
+        connection.get_transaction_status.return_value = (
+            extensions.TRANSACTION_STATUS_INTRANS
+        )
+        pool.put(connection)
+        connection.rollback.assert_called_once_with()
+        self.assertEqual(pool.idle, [connection])
+
+    def test_broken_connection_frees_its_slot(self):
+        pool = self.pool(max_size=1)
+        broken = pool.get()
+        broken.closed = 2
+        pool.put(broken)
+        self.assertEqual((pool.idle, pool.size), ([], 0))
+        self.assertIsNot(pool.get(), broken)
+
+    def test_exhausted_pool_waits_then_times_out(self):
+        pool = self.pool(max_size=1, timeout=1)
+        busy = pool.get()
+        threading.Timer(0.05, pool.put, [busy]).start()
+        self.assertIs(pool.get(), busy)
+        pool.timeout = 0.05
+        with self.assertRaises(self.base.PoolTimeout):
+            pool.get()
+
+    def test_wrapper_close_returns_connection_to_pool(self):
+        wrapper = ConnectionHandler({DEFAULT_DB_ALIAS: {
+            'ENGINE': 'core.db.backends.postgresql',
+            'NAME': 'pooled',
+            'OPTIONS': {'POOL_MAX_SIZE': 1},
+        }})[DEFAULT_DB_ALIAS]
+        wrapper.ensure_connection()
+        first = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, first)
+        wrapper.close()
+        self.assertEqual(self.connect.call_count, 1)
+        self.assertNotIn('POOL_MAX_SIZE', self.connect.call_args[1])
+        first.close.assert_not_called()
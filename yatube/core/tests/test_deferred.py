@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.template import Context, Template
+from django.test import TestCase
+
+from core.deferred import DeferredFieldAccess
+
+User = get_user_model()
+
+
+class DeferredFieldGuardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User.objects.create_user(username='projected', email='a@b.c')
+
+    def test_loaded_fields_are_readable(self):
+        user = User.objects.only('username').get()
+        with self.assertNumQueries(0):
+            self.assertEqual(user.username, 'projected')
+
+    def test_deferred_field_access_raises(self):
+        user = User.objects.only('username').get()
+        with self.assertRaises(DeferredFieldAccess):
+            user.email
+
+    def test_template_does_not_swallow_deferred_access(self):
+        user = User.objects.only('username').get()
+        with self.assertRaises(DeferredFieldAccess):
+            Template('{{ user.email }}').render(Context({'user': user}))
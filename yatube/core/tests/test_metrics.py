@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .. import metrics
+
+
+class CacheMetricsTests(SimpleTestCase):
+    def setUp(self):
+        metrics.instrument(['default'])
+        cache.clear()
+        self.metrics = metrics.RequestMetrics()
+        token = metrics.current.set(self.metrics)
+        self.addCleanup(metrics.current.reset, token)
+
+    def test_get_many_counts_every_key(self):
+        cache.set_many({'first': 1, 'second': 2})
+        self.assertEqual(cache.get_many(['first', 'second', 'absent']),
+                         {'first': 1, 'second': 2})
+        self.assertEqual(cache.get('absent'), None)
+        self.assertEqual(
+            (self.metrics.cache_hits, self.metrics.cache_misses), (2, 2)
+        )
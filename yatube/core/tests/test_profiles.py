@@ -0,0 +1,31 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.profiles import measure
+
+
+class SettingsProfileTests(SimpleTestCase):
+    def test_prod_profile_has_no_debug_toolbar(self):
+        dev, prod = measure('dev'), measure('prod')
+        self.assertEqual(dev['apps'] - prod['apps'], 1)
+        self.assertLess(prod['modules'], dev['modules'])
+
+    def test_profiles_do_not_change_base(self):
+        from yatube.settings import base, dev, prod
+
+        self.assertIn('loaders', base.TEMPLATES[0]['OPTIONS'])
+        self.assertFalse(base.TEMPLATES[0].get('APP_DIRS'))
+        self.assertNotIn('loaders', dev.TEMPLATES[0]['OPTIONS'])
+        # Django сам дописывает CONN_MAX_AGE=0 в настройки активной базы
+        self.assertNotEqual(base.DATABASES['default'].get('CONN_MAX_AGE'),
+                            prod.DATABASES['default']['CONN_MAX_AGE'])
+
+    def test_command_reports_each_profile(self):
+        out = StringIO()
+        call_command('settings_cost', '--profile', 'prod',
+                     '--profile', 'bench', '--runs', '1', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines],
+                         ['prod', 'bench'])
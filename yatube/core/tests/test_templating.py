@@ -0,0 +1,41 @@
+import copy
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from core.templating import template_names, warm_up
+
+CACHED_TEMPLATES = copy.deepcopy(settings.TEMPLATES)
+CACHED_TEMPLATES[0]['APP_DIRS'] = False
+CACHED_TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS),
+]
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+class TemplateWarmupTests(SimpleTestCase):
+    def test_every_project_template_is_found(self):
+        names = template_names(engines['django'].engine)
+        for name in ('base.html', 'includes/description.html',
+                     'posts/index.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, names)
+
+    def test_warm_up_fills_cached_loader(self):
+        with self.assertLogs('core.templating', 'INFO'):
+            timings = warm_up()
+        self.assertTrue(all(seconds is not None for _, seconds in timings))
+        loader = engines['django'].engine.template_loaders[0]
+        cached = {key.split('-')[0] for key in loader.get_template_cache}
+        self.assertLessEqual({name for name, _ in timings}, cached)
+
+    def test_command_reports_parse_time(self):
+        out = StringIO()
+        with self.assertLogs('core.templating', 'INFO'):
+            call_command('warm_templates', '--top', '3', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn('Шаблонов:', lines[-1])
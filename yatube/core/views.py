@@ -1,6 +1,10 @@
 from http import HTTPStatus
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     return render(request,
@@ -22,3 +26,9 @@ def server_error(request):
                   'core/500.html',
                   status=HTTPStatus.INTERNAL_SERVER_ERROR.value
                   )
+
+
+@staff_member_required
+def request_metrics(request):
+    """Сводка метрик запросов этого процесса по именам URL."""
+    return JsonResponse(metrics.snapshot())
@@ -2,15 +2,23 @@ from django.contrib import admin
 
 from .models import Post
 from .models import Group
+from .search import filter_posts
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'created', 'author', 'group')
+    list_display = ('pk', 'text', 'created', 'author', 'group',
+                    'comment_count')
     list_editable = ('group',)
     search_fields = ('text',)
     list_filter = ('created',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # полнотекстовый индекс вместо LIKE '%q%' по всей таблице
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
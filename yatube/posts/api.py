@@ -0,0 +1,137 @@
+"""JSON-версии лент и страницы поста для мобильного клиента.
+
+Строки выбираются через values(), без создания моделей и без шаблонов.
+Параметр fields=id,text ограничивает и ответ, и колонки выборки: лишние
+JOIN к автору и группе не делаются, если их поля не запрошены. Страницы
+листаются курсором (?cursor=), как HTML-ленты.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+
+from .cache import get_cached_or_404
+from .feed import follow_feed
+from .models import Comment, Group, Post, User
+from .utilits import DEFAULT_KEYS, CursorPaginator
+
+# имя в ответе -> путь для values()
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comment_count': 'comment_count',
+    'last_commented_at': 'last_commented_at',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def api_view(view):
+    """Ошибки представления отдаются JSON, а не HTML-страницей."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({'error': 'not found'}, status=404)
+        except BadRequest as error:
+            return JsonResponse({'error': str(error)}, status=400)
+    return wrapper
+
+
+def requested_fields(request, available):
+    names = request.GET.get('fields')
+    if not names:
+        return list(available)
+    names = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(available))
+    if unknown:
+        raise BadRequest(f'unknown fields: {", ".join(unknown)}')
+    return names
+
+
+def serialize(row, names, available):
+    data = {name: row[available[name]] for name in names}
+    if data.get('image'):
+        # как post.image.url в шаблонах: хранилище само кодирует имя
+        data['image'] = default_storage.url(data['image'])
+    return data
+
+
+def page_response(request, queryset, available, keys=DEFAULT_KEYS,
+                  per_page=None, descending=True):
+    names = requested_fields(request, available)
+    # ключи курсора выбираются всегда, даже если их не просили
+    paths = {available[name] for name in names} | set(keys)
+    rows = queryset.values(*paths)
+    page = CursorPaginator(
+        rows, per_page or settings.PAGE_AMOUNT, keys, descending
+    ).get_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [serialize(row, names, available) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def index(request):
+    return page_response(request, Post.objects.all(), POST_FIELDS)
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_cached_or_404(Group, slug=slug)
+    return page_response(request, Post.objects.filter(group_id=group.id),
+                         POST_FIELDS)
+
+
+@api_view
+def profile(request, username):
+    author = get_cached_or_404(User, username=username)
+    return page_response(request, Post.objects.filter(author_id=author.id),
+                         POST_FIELDS)
+
+
+@api_view
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'authentication required'},
+                            status=401)
+    posts, keys = follow_feed(request.user)
+    return page_response(request, posts, POST_FIELDS, keys)
+
+
+@api_view
+def post_detail(request, post_id):
+    names = requested_fields(request, POST_FIELDS)
+    row = Post.objects.filter(id=post_id).values(
+        *{POST_FIELDS[name] for name in names}
+    ).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(serialize(row, names, POST_FIELDS),
+                        json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def comments(request, post_id):
+    post = get_cached_or_404(Post, id=post_id)
+    return page_response(request, Comment.objects.filter(post_id=post.id),
+                         COMMENT_FIELDS,
+                         per_page=settings.COMMENT_PAGE_AMOUNT,
+                         descending=False)
@@ -0,0 +1,507 @@
+"""Нагрузочный стенд для представлений posts.
+
+seed() заполняет базу объёмом, близким к боевому: тексты даёт Faker, а
+популярность авторов распределена по Ципфу, так что у немногих авторов
+большая часть постов и подписчиков. run() гоняет сценарии в несколько
+потоков — через тестовый Client в этом процессе или по HTTP к запущенному
+серверу — и собирает задержки и число SQL-запросов из X-Query-Count.
+"""
+import math
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate, islice
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Max, Min, Q
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+
+from . import cards, feed, search, stats
+from .cache import (author_version_key, bump_comment_version,
+                    bump_feed_version, bump_follow_version, object_key,
+                    post_version_key)
+from .fastcards import as_cards
+from .models import AuthorStats, Comment, FeedEntry, Follow, Group, Post
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench_'
+BENCH_SLUG_PREFIX = 'bench-'
+QUERY_HEADER = 'X-Query-Count'
+SCENARIOS = (
+    'index', 'group_posts', 'profile',
+    'post_detail', 'index_follow', 'create_post',
+)
+DEFAULT_MIX = {
+    'index': 30,
+    'group_posts': 15,
+    'profile': 15,
+    'post_detail': 25,
+    'index_follow': 10,
+    'create_post': 5,
+}
+
+Sample = namedtuple('Sample', 'name elapsed status queries')
+
+
+def zipf_cum_weights(size, exponent):
+    """Накопленные веса рангов 1..size для random.choices."""
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, size + 1)))
+
+
+def _chunks(total, size):
+    while total > 0:
+        yield min(size, total)
+        total -= size
+
+
+def seed(users, posts, groups, follows, skew=1.1, batch_size=5000,
+         feed_backfill=20, random_seed=0, log=print):
+    """Создаёт пользователей bench_*, группы, посты и граф подписок.
+
+    bulk_create обходит сигналы, поэтому в конце счётчики AuthorStats,
+    ленты подписок и поисковый индекс пересобираются целиком.
+    feed_backfill ограничивает число постов каждого автора в ленте
+    подписчика, иначе ленты разрастутся до сотен миллионов строк.
+    """
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+    rnd = random.Random(random_seed)
+
+    with transaction.atomic():
+        for number, size in enumerate(_chunks(users, batch_size)):
+            start = number * batch_size
+            User.objects.bulk_create([
+                User(username=f'{BENCH_PREFIX}{start + offset}',
+                     first_name=fake.first_name(),
+                     last_name=fake.last_name(),
+                     password='!')
+                for offset in range(size)
+            ])
+        # id по возрастанию — это ранг популярности
+        user_ids = list(User.objects.filter(
+            username__startswith=BENCH_PREFIX
+        ).order_by('id').values_list('id', flat=True))
+        log(f'Пользователей: {len(user_ids)}')
+
+        Group.objects.bulk_create([
+            Group(title=fake.sentence(nb_words=3)[:200],
+                  slug=f'{BENCH_SLUG_PREFIX}{number}',
+                  description=fake.paragraph())
+            for number in range(groups)
+        ])
+        group_ids = list(Group.objects.filter(
+            slug__startswith=BENCH_SLUG_PREFIX
+        ).values_list('id', flat=True))
+        log(f'Групп: {len(group_ids)}')
+
+        cum_weights = zipf_cum_weights(len(user_ids), skew)
+        group_choices = group_ids + [None]
+        for size in _chunks(posts, batch_size):
+            authors = rnd.choices(user_ids, cum_weights=cum_weights, k=size)
+            Post.objects.bulk_create([
+                Post(author_id=author_id,
+                     group_id=rnd.choice(group_choices),
+                     text=fake.text(max_nb_chars=300))
+                for author_id in authors
+            ])
+        log(f'Постов: {posts}')
+
+        created = 0
+        for start in range(0, len(user_ids), batch_size):
+            rows = []
+            for user_id in user_ids[start:start + batch_size]:
+                authors = set(rnd.choices(
+                    user_ids, cum_weights=cum_weights, k=follows
+                ))
+                authors.discard(user_id)
+                rows.extend(Follow(user_id=user_id, author_id=author_id)
+                            for author_id in authors)
+            Follow.objects.bulk_create(rows, ignore_conflicts=True)
+            created += len(rows)
+        log(f'Подписок: {created}')
+
+        stats.reconcile()
+        # только данные стенда: ленты и индекс остальных не пересобираются;
+        # подзапрос, а не список: id больше, чем параметров у SQLite
+        bench_ids = User.objects.filter(
+            username__startswith=BENCH_PREFIX
+        ).values('id')
+        feed.rebuild(feed_backfill, user_ids=bench_ids, author_ids=bench_ids)
+        search.rebuild(Post.objects.filter(
+            author_id__in=bench_ids
+        ).values_list('id', flat=True))
+    bump_feed_version()
+
+
+def _delete(queryset):
+    # DELETE одним запросом: без Collector, выборки строк и сигналов
+    return queryset._raw_delete(queryset.db)
+
+
+def _forget(keys, batch_size):
+    keys = iter(keys)
+    while True:
+        chunk = list(islice(keys, batch_size))
+        if not chunk:
+            return
+        cache.delete_many(chunk)
+
+
+def flush(batch_size=5000):
+    """Удаляет всё, что создал seed().
+
+    Каскад через ORM поднял бы в память каждый пост, комментарий и
+    подписку и на каждой строке запустил бы сигналы счётчиков, поиска,
+    лент и кэша. Поэтому таблицы чистятся прямыми DELETE от зависимых к
+    главным, а счётчики, поисковый индекс и кэш приводятся в порядок после.
+    """
+    users = User.objects.filter(username__startswith=BENCH_PREFIX)
+    groups = Group.objects.filter(slug__startswith=BENCH_SLUG_PREFIX)
+    user_ids = users.values('id')
+    posts = Post.objects.filter(author_id__in=user_ids)
+    post_ids = posts.values('id')
+    with transaction.atomic():
+        # чужие строки, которые задевает удаление
+        commented = set(Comment.objects.filter(
+            author_id__in=user_ids
+        ).exclude(post_id__in=post_ids).values_list('post_id', flat=True))
+        followers = set(Follow.objects.filter(
+            author_id__in=user_ids
+        ).exclude(user_id__in=user_ids).values_list('user_id', flat=True))
+        keys = [
+            key
+            for user_id, username in users.values_list('id', 'username')
+            for key in (object_key(User, 'id', user_id),
+                        object_key(User, 'username', username),
+                        author_version_key(user_id))
+        ] + [
+            key
+            for group_id, slug in groups.values_list('id', 'slug')
+            for key in (object_key(Group, 'id', group_id),
+                        object_key(Group, 'slug', slug))
+        ]
+        # постов миллионы: ключи их кэша строятся потоком уже после
+        bench_post_ids = list(posts.values_list('id', flat=True))
+
+        _delete(FeedEntry.objects.filter(
+            Q(user_id__in=user_ids) | Q(author_id__in=user_ids)
+        ))
+        _delete(Comment.objects.filter(
+            Q(author_id__in=user_ids) | Q(post_id__in=post_ids)
+        ))
+        _delete(Follow.objects.filter(
+            Q(user_id__in=user_ids) | Q(author_id__in=user_ids)
+        ))
+        _delete(AuthorStats.objects.filter(author_id__in=user_ids))
+        # у Post.group SET_NULL: чужие посты остаются без группы
+        Post.objects.filter(group_id__in=groups.values('id')).exclude(
+            author_id__in=user_ids
+        ).update(group=None)
+        _delete(posts)
+        _delete(groups)
+        for through in (User.groups.through, User.user_permissions.through,
+                        LogEntry):
+            _delete(through.objects.filter(user_id__in=user_ids))
+        _delete(users)
+
+        stats.reconcile()
+        stats.reconcile_comments()
+        search.rebuild(bench_post_ids)
+    _forget(keys, batch_size)
+    _forget((key
+             for post_id in bench_post_ids
+             for key in (object_key(Post, 'id', post_id),
+                         post_version_key(post_id))), batch_size)
+    for post_id in commented:
+        bump_comment_version(post_id)
+    for user_id in followers:
+        bump_follow_version(user_id)
+    bump_feed_version()
+
+
+class Targets:
+    """Адреса для сценариев, выбранные заранее, чтобы не мерить свой ORM."""
+
+    def __init__(self, skew=1.1, sample=10000):
+        self.usernames = list(User.objects.filter(
+            username__startswith=BENCH_PREFIX
+        ).order_by('id').values_list('username', flat=True)[:sample])
+        if not self.usernames:
+            raise ValueError('Нет пользователей bench_*: сначала bench_seed.')
+        self.cum_weights = zipf_cum_weights(len(self.usernames), skew)
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        bounds = Post.objects.aggregate(low=Min('id'), high=Max('id'))
+        self.post_ids = (bounds['low'] or 1, bounds['high'] or 1)
+
+    def request(self, name, rnd):
+        """(method, path, data) для одного обращения к сценарию."""
+        if name == 'index':
+            return 'get', reverse('posts:index'), None
+        if name == 'group_posts' and self.slugs:
+            return 'get', reverse('posts:group_list', kwargs={
+                'slug': rnd.choice(self.slugs)}), None
+        if name == 'profile':
+            username = rnd.choices(self.usernames,
+                                   cum_weights=self.cum_weights)[0]
+            return 'get', reverse('posts:profile', kwargs={
+                'username': username}), None
+        if name == 'post_detail':
+            return 'get', reverse('posts:post_detail', kwargs={
+                'post_id': rnd.randint(*self.post_ids)}), None
+        if name == 'index_follow':
+            return 'get', reverse('posts:index_follow'), None
+        if name == 'create_post':
+            return 'post', reverse('posts:create'), {
+                'text': f'Нагрузочный пост {rnd.random()}'}
+        return 'get', reverse('posts:index'), None
+
+
+class ClientTransport:
+    """Запросы через тестовый Client в текущем процессе, без сети."""
+
+    target = 'in-process'
+    # адрес вне INTERNAL_IPS, чтобы debug_toolbar не искажал замеры
+    remote_addr = '192.0.2.1'
+
+    def __init__(self, user):
+        self.client = Client(REMOTE_ADDR=self.remote_addr)
+        self.client.force_login(user)
+
+    def send(self, method, path, data):
+        response = getattr(self.client, method)(path, data)
+        return response.status_code, response.get(QUERY_HEADER)
+
+
+class HttpTransport:
+    """Запросы по HTTP; сессия пишется в ту же базу, что у сервера."""
+
+    def __init__(self, base_url, user):
+        import requests
+
+        self.target = base_url
+        self.session = requests.Session()
+        store = SessionStore()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.save()
+        self.session.cookies.set(settings.SESSION_COOKIE_NAME,
+                                 store.session_key)
+
+    def send(self, method, path, data):
+        url = urljoin(self.target, path)
+        if method == 'post':
+            token = self.session.cookies.get(settings.CSRF_COOKIE_NAME)
+            if token is None:
+                self.session.get(url)
+                token = self.session.cookies.get(settings.CSRF_COOKIE_NAME)
+            data = dict(data, csrfmiddlewaretoken=token)
+            response = self.session.post(url, data=data, headers={
+                'Referer': url}, allow_redirects=False)
+        else:
+            response = self.session.get(url, params=data,
+                                        allow_redirects=False)
+        return response.status_code, response.headers.get(QUERY_HEADER)
+
+
+class _Budget:
+    def __init__(self, total):
+        self.left = total
+        self.lock = threading.Lock()
+
+    def take(self):
+        if self.left is None:
+            return True
+        with self.lock:
+            if self.left <= 0:
+                return False
+            self.left -= 1
+            return True
+
+
+def _drive(transport, targets, mix, deadline, budget, rnd):
+    names = list(mix)
+    cum_weights = list(accumulate(mix[name] for name in names))
+    samples = []
+    while time.monotonic() < deadline and budget.take():
+        name = rnd.choices(names, cum_weights=cum_weights)[0]
+        method, path, data = targets.request(name, rnd)
+        start = time.perf_counter()
+        try:
+            status, queries = transport.send(method, path, data)
+        except Exception:
+            status, queries = None, None
+        samples.append(Sample(name, time.perf_counter() - start, status,
+                              int(queries) if queries else None))
+    return samples
+
+
+def _thread_drive(*args):
+    try:
+        return _drive(*args)
+    finally:
+        # у каждого потока своё соединение с базой
+        connections.close_all()
+
+
+def run(concurrency=8, duration=30, requests=None, mix=None, url=None,
+        skew=1.1, random_seed=0):
+    """Гоняет сценарии и возвращает отчёт, пригодный для json.dump."""
+    mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items()
+           if weight > 0}
+    rnd = random.Random(random_seed)
+    targets = Targets(skew)
+    users = list(User.objects.filter(username__in=rnd.sample(
+        targets.usernames, min(concurrency, len(targets.usernames))
+    )))
+    transports = [
+        HttpTransport(url, users[number % len(users)]) if url
+        else ClientTransport(users[number % len(users)])
+        for number in range(concurrency)
+    ]
+    budget = _Budget(requests)
+    started_at = timezone.now()
+    start = time.perf_counter()
+    deadline = time.monotonic() + duration
+    jobs = [
+        (transport, targets, mix, deadline, budget,
+         random.Random(rnd.random()))
+        for transport in transports
+    ]
+    if concurrency == 1:
+        samples = _drive(*jobs[0])
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = [sample
+                       for chunk in executor.map(_thread_drive, *zip(*jobs))
+                       for sample in chunk]
+    elapsed = time.perf_counter() - start
+
+    views = {}
+    for name in SCENARIOS:
+        rows = [sample for sample in samples if sample.name == name]
+        if rows:
+            views[name] = summarize(rows, elapsed)
+    return {
+        'meta': {
+            'started_at': started_at.isoformat(),
+            'target': transports[0].target,
+            'concurrency': concurrency,
+            'duration_s': round(elapsed, 3),
+            'mix': mix,
+            'dataset': {
+                'users': User.objects.count(),
+                'posts': Post.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+        },
+        'views': views,
+        'total': summarize(samples, elapsed),
+    }
+
+
+def percentile(ordered, q):
+    """Перцентиль методом ближайшего ранга по отсортированному списку."""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample.elapsed * 1000 for sample in samples)
+    queries = [sample.queries for sample in samples
+               if sample.queries is not None]
+    errors = sum(1 for sample in samples
+                 if sample.status is None or sample.status >= 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'rps': round(len(samples) / elapsed, 2) if elapsed else None,
+        'mean_ms': (round(sum(latencies) / len(latencies), 3)
+                    if latencies else None),
+        'p50_ms': _rounded(percentile(latencies, 50)),
+        'p95_ms': _rounded(percentile(latencies, 95)),
+        'p99_ms': _rounded(percentile(latencies, 99)),
+        'queries_per_request': (round(sum(queries) / len(queries), 2)
+                                if queries else None),
+        'max_queries': max(queries) if queries else None,
+    }
+
+
+def _rounded(value):
+    return None if value is None else round(value, 3)
+
+
+def compare(previous, current, threshold=10.0):
+    """Регрессии относительно прошлого отчёта.
+
+    Регрессией считается рост p95 или падение RPS больше чем на threshold
+    процентов и любой рост среднего числа запросов.
+    """
+    regressions = []
+    for name, row in current['views'].items():
+        old = previous.get('views', {}).get(name)
+        if not old:
+            continue
+        checks = (
+            ('p95_ms', lambda was, now: now > was * (1 + threshold / 100)),
+            ('rps', lambda was, now: now < was * (1 - threshold / 100)),
+            ('queries_per_request', lambda was, now: now > was),
+        )
+        for metric, worse in checks:
+            was, now = old.get(metric), row.get(metric)
+            if was is not None and now is not None and worse(was, now):
+                regressions.append((name, metric, was, now))
+    return regressions
+
+
+def card_cost(pages=200, per_page=None):
+    """CPU на страницу ленты: модели и шаблон против кортежей и PostCard.
+
+    Кэш карточек не участвует: меряется худший случай, когда каждая
+    карточка страницы — промах. Время процессорное, без ожидания.
+    """
+    per_page = per_page or settings.PAGE_AMOUNT
+    total = Post.objects.count()
+    if total == 0:
+        raise ValueError('Нет постов: сначала bench_seed')
+    paths = {
+        'models': Post.objects.for_feed(),
+        'tuples': as_cards(Post.objects.all()),
+    }
+    report = {}
+    for name, queryset in paths.items():
+        fetch = render = 0.0
+        for page in range(pages):
+            offset = page * per_page % max(total - per_page, 1)
+            start = time.process_time()
+            rows = list(queryset[offset:offset + per_page])
+            fetched = time.process_time()
+            for row in rows:
+                cards.render_card(row)
+            fetch += fetched - start
+            render += time.process_time() - fetched
+        report[name] = {
+            'fetch_ms': round(fetch / pages * 1000, 3),
+            'render_ms': round(render / pages * 1000, 3),
+            'page_ms': round((fetch + render) / pages * 1000, 3),
+        }
+    models, tuples = report['models']['page_ms'], report['tuples']['page_ms']
+    report['saved_pct'] = (round((models - tuples) / models * 100, 1)
+                           if models else None)
+    return report
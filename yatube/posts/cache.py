@@ -0,0 +1,261 @@
+"""Версии кэша, которые сбрасываются событиями, а не таймаутом.
+
+Фрагменты лент и карточки постов кэшируются надолго с версией в ключе:
+сигнал сохранения или удаления увеличивает версию, и старые записи
+просто перестают запрашиваться. Фрагмент ленты держит готовые карточки,
+поэтому всё, что меняет карточку, сбрасывает и версию лент.
+
+Здесь же read-through кэш строк User, Group и Post по полям из
+CACHED_LOOKUPS: объект кладётся без связанных объектов, сигналы удаляют
+его ключи, а отсутствующий объект кэшируется коротким маркером, чтобы
+повторные 404 тоже не ходили в базу.
+"""
+import copy
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from .models import Group, Post, User
+
+FEED_VERSION_KEY = 'version:feed'
+MISSING = 'object:missing'
+CACHED_LOOKUPS = {
+    User: ('id', 'username'),
+    Group: ('id', 'slug'),
+    Post: ('id',),
+}
+# общий кэш видят все воркеры: у User кладутся только колонки, которые
+# выводят шаблоны, без хэша пароля и почты
+CACHED_FIELDS = {
+    User: ('id', 'username', 'first_name', 'last_name'),
+}
+
+
+def _initial_version():
+    # после вытеснения счётчика нельзя начинать с 1: старые фрагменты
+    # с той же версией снова стали бы валидными
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key, _initial_version())
+    return version
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def feed_version():
+    return get_version(FEED_VERSION_KEY)
+
+
+def bump_feed_version():
+    return bump_version(FEED_VERSION_KEY)
+
+
+# комментарий меняет число в карточке, но не состав лент: сбрасываются
+# только ленты, где виден его пост, а не общая версия
+COMMENTS_VERSION_KEY = 'version:feed:comments'
+
+
+def comments_version():
+    """Меняется с каждым комментарием: главная показывает все посты."""
+    return get_version(COMMENTS_VERSION_KEY)
+
+
+def group_feed_version(group_id):
+    return get_version(f'version:feed:group:{group_id}')
+
+
+def profile_version_key(username):
+    # по username из URL: ETag профиля считается без запроса автора
+    digest = hashlib.md5(username.encode()).hexdigest()
+    return f'version:feed:profile:{digest}'
+
+
+def profile_version(username):
+    return get_version(profile_version_key(username))
+
+
+def bump_comment_feeds(post):
+    """Сбрасывает главную, ленту группы и профиль автора поста."""
+    bump_version(COMMENTS_VERSION_KEY)
+    if post.group_id is not None:
+        bump_version(f'version:feed:group:{post.group_id}')
+    author = get_cached(User, id=post.author_id)
+    if author is not None:
+        bump_version(profile_version_key(author.username))
+
+
+def follow_version(user_id):
+    """Меняется, когда пользователь подписывается или отписывается."""
+    return get_version(f'version:follow:{user_id}')
+
+
+def bump_follow_version(user_id):
+    return bump_version(f'version:follow:{user_id}')
+
+
+def comment_version(post_id):
+    return get_version(f'version:comments:{post_id}')
+
+
+def bump_comment_version(post_id):
+    return bump_version(f'version:comments:{post_id}')
+
+
+def get_versions(keys):
+    """Версии по списку ключей за один поход в кэш; недостающие создаются."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = get_version(key)
+    return versions
+
+
+def post_version_key(post_id):
+    return f'version:post:{post_id}'
+
+
+def bump_post_version(post_id):
+    return bump_version(post_version_key(post_id))
+
+
+def author_version_key(user_id):
+    # имя и username автора выводятся в каждой карточке его постов
+    return f'version:author:{user_id}'
+
+
+def bump_author_version(user_id):
+    return bump_version(author_version_key(user_id))
+
+
+def thumbnail_version_key(name):
+    digest = hashlib.md5(name.encode()).hexdigest()
+    return f'version:thumbnail:{digest}'
+
+
+def bump_thumbnail_version(name):
+    return bump_version(thumbnail_version_key(name))
+
+
+def page_owner(user, page_obj):
+    """Персональная часть ключа: id зрителя, если на странице его посты.
+
+    Остальные зрители получают общий фрагмент без ссылок на редактирование.
+    """
+    if user.is_authenticated and any(
+        post.author_id == user.id for post in page_obj
+    ):
+        return user.id
+    return ''
+
+
+def object_key(model, field, value):
+    # username из URL может содержать что угодно, а memcached не примет
+    # пробелы и управляющие символы
+    digest = hashlib.md5(str(value).encode()).hexdigest()
+    return f'object:{model._meta.label_lower}:{field}:{digest}'
+
+
+def _cache_row(obj):
+    """Кладёт строку под всеми ключами её модели, без связанных объектов."""
+    model = type(obj)
+    if model in CACHED_FIELDS:
+        # остальные поля отложены: догрузка видна под DEFERRED_FIELD_GUARD
+        names = [field.attname for field in model._meta.concrete_fields
+                 if field.attname in CACHED_FIELDS[model]]
+        row = model.from_db(obj._state.db, names,
+                            [getattr(obj, name) for name in names])
+    else:
+        row = copy.copy(obj)
+        row._state = copy.copy(obj._state)
+        row._state.fields_cache = {}
+    cache.set_many({
+        object_key(type(obj), field, getattr(obj, field)): row
+        for field in CACHED_LOOKUPS[type(obj)]
+    }, settings.OBJECT_CACHE_TIMEOUT)
+
+
+def get_cached(model, related=(), **lookup):
+    """Объект по одному полю из CACHED_LOOKUPS или None, если его нет.
+
+    related уходят в select_related при промахе: связанные строки из
+    CACHED_LOOKUPS кэшируются под своими ключами, и следующий запрос
+    достанет их по id без базы.
+    """
+    (field, value), = lookup.items()
+    key = object_key(model, field, value)
+    obj = cache.get(key)
+    if obj == MISSING:
+        return None
+    # после переименования старый ключ может хранить объект с новым именем
+    if obj is not None and str(getattr(obj, field)) == str(value):
+        return obj
+    try:
+        obj = model._default_manager.select_related(*related).get(**lookup)
+    except model.DoesNotExist:
+        cache.set(key, MISSING, settings.OBJECT_CACHE_MISS_TIMEOUT)
+        return None
+    _cache_row(obj)
+    for path in related:
+        name = path.split('__')[0]
+        if model._meta.get_field(name).related_model not in CACHED_LOOKUPS:
+            continue
+        related_obj = getattr(obj, name)
+        if related_obj is not None:
+            _cache_row(related_obj)
+    return obj
+
+
+def get_cached_or_404(model, related=(), **lookup):
+    obj = get_cached(model, related, **lookup)
+    if obj is None:
+        raise Http404(f'{model._meta.object_name} не найден')
+    return obj
+
+
+def get_post_or_404(post_id):
+    """Пост вместе с автором и группой, каждый из своего ключа кэша."""
+    post = get_cached_or_404(Post, ('author__stats', 'group'), id=post_id)
+    if 'author' not in post._state.fields_cache:
+        author = get_cached(User, id=post.author_id)
+        if author is not None:
+            post.author = author
+    if post.group_id is not None and 'group' not in post._state.fields_cache:
+        group = get_cached(Group, id=post.group_id)
+        if group is not None:
+            post.group = group
+    return post
+
+
+def invalidate_object(instance):
+    model = type(instance)
+    rows = [instance]
+    # строка под ключом id хранит прежние значения: после переименования
+    # надо удалить и ключ старого имени
+    cached = cache.get(object_key(model, 'id', instance.pk))
+    if isinstance(cached, model):
+        rows.append(cached)
+    keys = list({
+        object_key(model, field, getattr(row, field))
+        for row in rows
+        for field in CACHED_LOOKUPS[model]
+    })
+    cache.delete_many(keys)
+    # читатель мог успеть положить старую строку до коммита
+    transaction.on_commit(partial(cache.delete_many, keys))
@@ -0,0 +1,63 @@
+"""Кэш HTML карточек постов (includes/description.html).
+
+Ключ карточки собирается из id поста и трёх версий: поста (правка,
+комментарии), автора (имя) и картинки (готовность миниатюры). Страница
+ленты достаёт версии и карточки двумя get_many и рендерит только
+промахи, поэтому сброс кэша всей ленты стоит несколько карточек, а не
+страницу шаблонов.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from . import fastcards
+from .cache import (author_version_key, get_versions, post_version_key,
+                    thumbnail_version_key)
+
+CARD_TEMPLATE = 'includes/description.html'
+
+
+def _version_keys(post):
+    keys = [post_version_key(post.id), author_version_key(post.author_id)]
+    if post.image:
+        # str() даёт имя файла и у FieldFile, и у строки PostCard
+        keys.append(thumbnail_version_key(str(post.image)))
+    return keys
+
+
+def card_keys(posts):
+    """Ключи карточек по id поста."""
+    keys = {post.id: _version_keys(post) for post in posts}
+    versions = get_versions(
+        list({key for post_keys in keys.values() for key in post_keys})
+    )
+    return {
+        post_id: 'card:{}:{}'.format(
+            post_id, ':'.join(str(versions[key]) for key in post_keys)
+        )
+        for post_id, post_keys in keys.items()
+    }
+
+
+def render_card(post):
+    if isinstance(post, fastcards.PostCard):
+        return fastcards.render_card(post)
+    return get_template(CARD_TEMPLATE).render({'post': post})
+
+
+def render_cards(posts):
+    """HTML карточек по id поста: из кэша, промахи рендерятся и кладутся."""
+    posts = list(posts)
+    if not posts:
+        return {}
+    keys = card_keys(posts)
+    cached = cache.get_many(list(keys.values()))
+    cards, missed = {}, {}
+    for post in posts:
+        key = keys[post.id]
+        if key not in cached:
+            cached[key] = missed[key] = render_card(post)
+        cards[post.id] = mark_safe(cached[key])
+    cache.set_many(missed, settings.CARD_CACHE_TIMEOUT)
+    return cards
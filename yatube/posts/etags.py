@@ -0,0 +1,48 @@
+"""ETag для условных GET лент и страницы поста.
+
+Валидатор собирается из счётчиков версий в кэше и id зрителя, страницы
+не загружаются: на тот же If-None-Match декоратор condition отвечает 304
+до вызова представления. Last-Modified не отдаётся: правка поста не
+меняет ни одной даты, и проверка по If-Modified-Since пропустила бы её.
+"""
+import hashlib
+
+from .cache import (comment_version, comments_version, feed_version,
+                    follow_version, get_cached, group_feed_version,
+                    profile_version)
+from .models import Group
+
+
+def make_etag(*parts):
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _viewer(request):
+    # шапка и ссылки на редактирование у каждого зрителя свои
+    return request.user.id or ''
+
+
+def index_etag(request):
+    return make_etag('index', feed_version(), comments_version(),
+                     _viewer(request))
+
+
+def group_etag(request, slug):
+    # строка группы почти всегда в кэше объектов, базы нет
+    group = get_cached(Group, slug=slug)
+    return make_etag('group', slug, feed_version(),
+                     group_feed_version(group.id) if group else '',
+                     _viewer(request))
+
+
+def profile_etag(request, username):
+    viewer = _viewer(request)
+    return make_etag('profile', username, feed_version(),
+                     profile_version(username), viewer,
+                     follow_version(viewer) if viewer else '')
+
+
+def post_etag(request, post_id):
+    # правку и удаление поста ловит версия лент
+    return make_etag('post', post_id, feed_version(), _viewer(request),
+                     comment_version(post_id))
@@ -0,0 +1,80 @@
+"""Потоковая выгрузка постов, комментариев и подписок в NDJSON или CSV.
+
+Строки читаются через values().iterator(chunk_size): в PostgreSQL это
+серверный курсор, в SQLite — выборка кусками, поэтому память не растёт
+с размером таблицы. Выгрузка ограничивается одним пользователем (его
+посты, комментарии и подписки) или охватывает весь сайт.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Post
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+# с этих символов таблицы начинают формулу; так же экранируют их
+# распространённые выгрузки CSV
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# модель, поля выгрузки и поле, по которому выбираются строки пользователя
+EXPORTS = {
+    'posts': (Post, ('id', 'author__username', 'group__slug', 'text',
+                     'image', 'created'), 'author'),
+    'comments': (Comment, ('id', 'post_id', 'author__username', 'text',
+                           'created'), 'author'),
+    'follows': (Follow, ('id', 'user__username', 'author__username'),
+                'user'),
+}
+
+
+def fields(kind):
+    return EXPORTS[kind][1]
+
+
+def rows(kind, user=None, chunk_size=CHUNK_SIZE):
+    """Словари строк выгрузки по порядку id."""
+    model, names, owner = EXPORTS[kind]
+    queryset = model.objects.all()
+    if user is not None:
+        queryset = queryset.filter(**{owner: user})
+    return queryset.order_by('id').values(*names).iterator(
+        chunk_size=chunk_size
+    )
+
+
+class _Line:
+    """Файл для csv.writer, который отдаёт записанную строку назад."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(records):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for record in records:
+        yield encoder.encode(record) + '\n'
+
+
+def csv_cell(value):
+    """Текст пользователя, который таблица не примет за формулу."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(records, names):
+    writer = csv.writer(_Line())
+    yield writer.writerow(names)
+    for record in records:
+        yield writer.writerow([csv_cell(record[name]) for name in names])
+
+
+def lines(kind, fmt='ndjson', user=None, chunk_size=CHUNK_SIZE):
+    """Генератор строк выгрузки в формате fmt."""
+    records = rows(kind, user, chunk_size)
+    if fmt == 'csv':
+        return csv_lines(records, fields(kind))
+    return ndjson_lines(records)
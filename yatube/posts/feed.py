@@ -0,0 +1,172 @@
+"""Лента подписок, материализованная при записи (fan-out on write).
+
+Новый пост раскладывается в FeedEntry каждого подписчика автора, поэтому
+страница /follow/ читает один диапазон индекса (user, created) вместо
+соединения Follow и Post. Авторы, у которых подписчиков не меньше
+FEED_FANOUT_LIMIT, не раскладываются: их посты подмешиваются при чтении.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from . import stats
+from .cache import bump_follow_version
+from .models import AuthorStats, FeedEntry, Follow, Post
+from .utilits import DEFAULT_KEYS
+
+# ключи курсора совпадают с индексом feed_user_created_idx
+FEED_KEYS = ('feed_created', 'feed_post')
+
+
+def is_pull_author(author_id):
+    count = AuthorStats.objects.filter(author_id=author_id).values_list(
+        'follower_count', flat=True
+    ).first()
+    return (count or 0) >= settings.FEED_FANOUT_LIMIT
+
+
+def _entries(user_ids, posts, author_id):
+    return [
+        FeedEntry(user_id=user_id, post_id=post_id,
+                  author_id=author_id, created=created)
+        for user_id in user_ids
+        for post_id, created in posts
+    ]
+
+
+def _write(entries):
+    FeedEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    """Кладёт новый пост в ленты всех подписчиков автора."""
+    fan_out_posts(post.author_id, [post])
+
+
+def fan_out_posts(author_id, posts):
+    """Кладёт новые посты одного автора в ленты его подписчиков."""
+    if is_pull_author(author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    _write(_entries(follower_ids, [(post.pk, post.created) for post in posts],
+                    author_id))
+
+
+def _recent_posts(author_id, limit=None):
+    if limit is None:
+        limit = settings.FEED_BACKFILL_SIZE
+    return list(
+        Post.objects.filter(author_id=author_id).order_by(
+            '-created', '-id'
+        ).values_list('id', 'created')[:limit]
+    )
+
+
+def backfill(user_id, author_id):
+    """Дописывает в ленту подписчика последние посты нового автора."""
+    if is_pull_author(author_id):
+        return
+    _write(_entries([user_id], _recent_posts(author_id), author_id))
+
+
+def backfill_followers(author_id):
+    """Материализует посты автора, который перестал быть pull-автором."""
+    follower_ids = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    _write(_entries(follower_ids, _recent_posts(author_id), author_id))
+
+
+def rebuild(backfill_size=None, user_ids=None, author_ids=None):
+    """Собирает ленты заново после загрузки в обход сигналов.
+
+    user_ids и author_ids (список или values('id')) ограничивают сборку
+    лентами этих пользователей и постами этих авторов, остальные ленты не
+    трогаются. Счётчики подписчиков в AuthorStats должны быть уже
+    пересчитаны.
+    """
+    entries = FeedEntry.objects.all()
+    follows = Follow.objects.all()
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+        follows = follows.filter(user_id__in=user_ids)
+    if author_ids is not None:
+        entries = entries.filter(author_id__in=author_ids)
+        follows = follows.filter(author_id__in=author_ids)
+    entries.delete()
+    pull_ids = set(AuthorStats.objects.filter(
+        follower_count__gte=settings.FEED_FANOUT_LIMIT
+    ).values_list('author_id', flat=True))
+    authors = follows.order_by().values_list('author_id', flat=True).distinct()
+    for author_id in list(authors):
+        if author_id in pull_ids:
+            continue
+        follower_ids = follows.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True)
+        _write(_entries(follower_ids,
+                        _recent_posts(author_id, backfill_size), author_id))
+
+
+def purge(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def followed(user_id, author_id):
+    """Обновляет счётчик и ленту после появления подписки."""
+    stats.change_counter(author_id, 'follower_count', 1)
+    backfill(user_id, author_id)
+    bump_follow_version(user_id)
+
+
+def unfollowed(user_id, author_id):
+    """Обновляет счётчик и ленту после удаления подписки."""
+    purge(user_id, author_id)
+    count = stats.change_counter(author_id, 'follower_count', -1)
+    if count == settings.FEED_FANOUT_LIMIT - 1:
+        backfill_followers(author_id)
+    bump_follow_version(user_id)
+
+
+def follow(user, author):
+    """Идемпотентная подписка: повтор стоит один запрос INSERT."""
+    with transaction.atomic(savepoint=False):
+        if Follow.objects.follow(user, author):
+            followed(user.pk, author.pk)
+
+
+def unfollow(user, author):
+    """Идемпотентная отписка: повтор стоит один запрос DELETE."""
+    with transaction.atomic(savepoint=False):
+        if Follow.objects.unfollow(user, author):
+            unfollowed(user.pk, author.pk)
+
+
+def follow_feed(user):
+    """Посты ленты подписок и ключи сортировки для пагинации.
+
+    Без pull-авторов лента — один диапазон индекса FeedEntry, поэтому
+    сортировка идёт по его колонкам, а не по колонкам Post.
+    """
+    pull_ids = list(
+        Follow.objects.filter(
+            user=user,
+            author__stats__follower_count__gte=settings.FEED_FANOUT_LIMIT,
+        ).values_list('author_id', flat=True)
+    )
+    if not pull_ids:
+        posts = Post.objects.filter(feed_entries__user=user).annotate(
+            feed_created=F('feed_entries__created'),
+            feed_post=F('feed_entries__post'),
+        ).order_by('-feed_created', '-feed_post')
+        return posts, FEED_KEYS
+    pushed = FeedEntry.objects.filter(user=user).values('post_id')
+    posts = Post.objects.filter(Q(id__in=pushed) | Q(author_id__in=pull_ids))
+    return posts.order_by('-created', '-id'), DEFAULT_KEYS
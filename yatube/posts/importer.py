@@ -0,0 +1,235 @@
+"""Массовый импорт постов из JSONL или CSV.
+
+Записи читаются потоком и пишутся пачками через bulk_create, каждая пачка
+в своей транзакции. bulk_create обходит сигналы, поэтому счётчики авторов,
+ленты подписок, поисковый индекс и миниатюры обновляются здесь же. В той же
+транзакции ImportProgress запоминает номер последней записи, и прерванный
+импорт продолжается с места остановки без дублей.
+
+Поля записи: author (username), text, group (slug, необязательно),
+created (ISO 8601, необязательно), image (путь к файлу внутри
+--images-dir, необязательно).
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from PIL import Image
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import feed, search, stats, thumbnails
+from .cache import bump_feed_version, object_key
+from .models import Group, ImportProgress, Post, User
+
+
+def read_records(path, fmt=None):
+    """Записи файла по одной; битая строка JSONL даёт None."""
+    fmt = fmt or ('csv' if path.endswith('.csv') else 'jsonl')
+    with open(path, encoding='utf-8', newline='') as source:
+        if fmt == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else None
+
+
+def parse_created(value):
+    """Дата из записи; без неё — текущее время, неразборчивая — None."""
+    if not value:
+        return timezone.now()
+    try:
+        created = parse_datetime(value)
+    except ValueError:
+        return None
+    if created is not None and timezone.is_naive(created):
+        created = timezone.make_aware(created)
+    return created
+
+
+class PostImporter:
+    def __init__(self, batch_size=1000, images_dir=None, workers=8,
+                 create_authors=False, create_groups=False, log=print):
+        self.batch_size = batch_size
+        self.images_dir = images_dir
+        self.create_authors = create_authors
+        self.create_groups = create_groups
+        self.log = log
+        # справочники целиком в памяти: одна выборка вместо запроса на запись
+        self.authors = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.imported = 0
+        self.skipped = 0
+
+    def _author_id(self, username):
+        if username and username not in self.authors and self.create_authors:
+            self.authors[username] = User.objects.create(
+                username=username, password='!'
+            ).id
+        return self.authors.get(username)
+
+    def _group_id(self, slug):
+        if slug not in self.groups and self.create_groups:
+            self.groups[slug] = Group.objects.create(
+                title=slug, slug=slug, description=''
+            ).id
+        return self.groups.get(slug)
+
+    def _prepare(self, number, record):
+        if record is None:
+            return self._skip(number, 'запись не разобрана')
+        author_id = self._author_id(record.get('author'))
+        if author_id is None:
+            return self._skip(number, f'нет автора {record.get("author")}')
+        text = record.get('text')
+        if not text:
+            return self._skip(number, 'пустой текст')
+        group_id = None
+        if record.get('group'):
+            group_id = self._group_id(record['group'])
+            if group_id is None:
+                return self._skip(number, f'нет группы {record["group"]}')
+        created = parse_created(record.get('created'))
+        if created is None:
+            return self._skip(number, 'неверная дата')
+        image = record.get('image') or ''
+        if image:
+            if not self.images_dir:
+                return self._skip(number, 'картинка без --images-dir')
+            image = self._image_path(image)
+            if image is None:
+                return self._skip(
+                    number, f'картинка вне --images-dir: {record["image"]}'
+                )
+        return Post(author_id=author_id, group_id=group_id, text=text,
+                    created=created, image=image)
+
+    def _skip(self, number, reason):
+        self.skipped += 1
+        self.log(f'Запись {number} пропущена: {reason}')
+        return None
+
+    def _image_path(self, name):
+        """Реальный путь картинки или None, если он выходит из images_dir.
+
+        Абсолютный путь, ../ и символические ссылки иначе позволили бы
+        скопировать в публичный MEDIA_ROOT любой файл, читаемый сервером.
+        """
+        root = os.path.realpath(self.images_dir)
+        path = os.path.realpath(os.path.join(root, name))
+        if os.path.commonpath([path, root]) != root:
+            return None
+        return path
+
+    def _copy_image(self, source):
+        try:
+            with open(source, 'rb') as image:
+                try:
+                    Image.open(image).verify()
+                except (OSError, SyntaxError) as error:
+                    self.log(f'{source} не картинка: {error}')
+                    return ''
+                image.seek(0)
+                return default_storage.save(
+                    f'posts/{os.path.basename(source)}', File(image)
+                )
+        except OSError as error:
+            self.log(f'Картинка {source} не скопирована: {error}')
+            return ''
+
+    def _copy_images(self, posts):
+        with_images = [post for post in posts if post.image]
+        names = self.executor.map(
+            self._copy_image, [post.image.name for post in with_images]
+        )
+        for post, name in zip(with_images, names):
+            post.image = name
+
+    def _insert(self, posts):
+        """bulk_create с датами из источника; новые посты с id."""
+        created = [post.created for post in posts]
+        last_id = Post.objects.aggregate(last=Max('id'))['last'] or 0
+        Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        if any(post.pk is None for post in posts):
+            # SQLite не возвращает id из bulk_create; писатель в SQLite
+            # один, поэтому новые строки — это всё, что после last_id
+            posts = list(Post.objects.filter(id__gt=last_id).order_by('id'))
+        # auto_now_add в bulk_create заменил даты на текущее время
+        for post, value in zip(posts, created):
+            post.created = value
+        Post.objects.bulk_update(posts, ['created'],
+                                 batch_size=self.batch_size)
+        return posts
+
+    def _write(self, posts, source, done):
+        with transaction.atomic():
+            ImportProgress.objects.filter(source=source).update(done=done)
+            if not posts:
+                return
+            posts = self._insert(posts)
+            per_author = {}
+            for post in posts:
+                per_author.setdefault(post.author_id, []).append(post)
+            for author_id, author_posts in per_author.items():
+                stats.change_counter(author_id, 'post_count',
+                                     len(author_posts))
+                feed.fan_out_posts(author_id, author_posts)
+            search.index_posts(posts)
+            for post in posts:
+                if post.image:
+                    transaction.on_commit(
+                        partial(thumbnails.enqueue, post.image.name)
+                    )
+        # короткий кэш 404 мог запомнить эти id
+        cache.delete_many([object_key(Post, 'id', post.pk) for post in posts])
+
+    def run(self, path, source=None, fmt=None):
+        """Импортирует файл и возвращает время работы в секундах.
+
+        source — ключ ImportProgress, по умолчанию абсолютный путь файла.
+        """
+        source = source or os.path.abspath(path)
+        done = ImportProgress.objects.get_or_create(source=source)[0].done
+        if done:
+            self.log(f'Продолжение с записи {done + 1}')
+        records = islice(read_records(path, fmt), done, None)
+        start = time.perf_counter()
+        try:
+            while True:
+                chunk = list(islice(records, self.batch_size))
+                if not chunk:
+                    break
+                posts = [
+                    post for post in (
+                        self._prepare(done + offset + 1, record)
+                        for offset, record in enumerate(chunk)
+                    ) if post is not None
+                ]
+                self._copy_images(posts)
+                done += len(chunk)
+                self._write(posts, source, done)
+                self.imported += len(posts)
+                elapsed = time.perf_counter() - start
+                self.log(f'Записей: {done}, импортировано: {self.imported}, '
+                         f'{self.imported / elapsed:.0f} постов/с')
+        finally:
+            self.executor.shutdown()
+            if self.imported:
+                bump_feed_version()
+        return time.perf_counter() - start
@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bench
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает CPU на страницу ленты: модели и шаблон против '
+            'кортежей и карточек PostCard.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=200)
+        parser.add_argument('--per-page', type=int)
+        parser.add_argument('--output',
+                            help='Записать отчёт в JSON-файл.')
+
+    def handle(self, *args, **options):
+        try:
+            report = bench.card_cost(options['pages'], options['per_page'])
+        except ValueError as error:
+            raise CommandError(error)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2)
+        for name in ('models', 'tuples'):
+            row = report[name]
+            self.stdout.write(
+                f'{name:<8} выборка {row["fetch_ms"]:>8} мс  рендер '
+                f'{row["render_ms"]:>8} мс  страница {row["page_ms"]:>8} мс'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Экономия CPU на страницу: {report["saved_pct"]}%'
+        ))
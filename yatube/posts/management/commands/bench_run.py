@@ -0,0 +1,83 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bench
+
+
+def parse_mix(value):
+    """'index=30,profile=10' -> {'index': 30, 'profile': 10}."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in bench.SCENARIOS or not weight.isdigit():
+            raise CommandError(f'Неверный сценарий в --mix: {part}')
+        mix[name] = int(weight)
+    return mix
+
+
+class Command(BaseCommand):
+    help = ('Нагружает представления posts и пишет p50/p95/p99, RPS и число '
+            'SQL-запросов на обращение в JSON-отчёт.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Длительность прогона в секундах.')
+        parser.add_argument('--requests', type=int,
+                            help='Остановиться после стольких обращений.')
+        parser.add_argument('--mix', type=parse_mix,
+                            help='Веса сценариев: index=30,profile=10.')
+        parser.add_argument('--url',
+                            help='Адрес запущенного сервера; без него '
+                                 'запросы идут через Client в процессе.')
+        parser.add_argument('--skew', type=float, default=1.1)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='bench.json')
+        parser.add_argument('--compare',
+                            help='Прошлый отчёт для поиска регрессий.')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Допустимое ухудшение p95 и RPS, %%.')
+
+    def handle(self, *args, **options):
+        try:
+            report = bench.run(
+                concurrency=options['concurrency'],
+                duration=options['duration'],
+                requests=options['requests'],
+                mix=options['mix'],
+                url=options['url'],
+                skew=options['skew'],
+                random_seed=options['seed'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+        rows = dict(report['views'], total=report['total'])
+        self.stdout.write(
+            f'{"сценарий":<14}{"запросов":>9}{"ошибок":>8}{"RPS":>9}'
+            f'{"p50":>9}{"p95":>9}{"p99":>9}{"SQL":>7}'
+        )
+        for name, row in rows.items():
+            cells = [str(row[key]) for key in (
+                'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request'
+            )]
+            self.stdout.write(
+                f'{name:<14}{row["requests"]:>9}{row["errors"]:>8}'
+                f'{cells[0]:>9}{cells[1]:>9}{cells[2]:>9}{cells[3]:>9}'
+                f'{cells[4]:>7}'
+            )
+        self.stdout.write(f'Отчёт записан в {options["output"]}')
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as previous:
+                regressions = bench.compare(
+                    json.load(previous), report, options['threshold']
+                )
+            for name, metric, was, now in regressions:
+                self.stderr.write(f'{name}: {metric} {was} -> {now}')
+            if regressions:
+                raise CommandError('Обнаружены регрессии производительности')
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bench
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу данными для нагрузочного теста: пользователи '
+            'bench_*, посты и подписки с перекосом популярности авторов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Подписок на одного пользователя.')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель распределения Ципфа.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--feed-backfill', type=int, default=20,
+                            help='Постов каждого автора в ленте подписчика.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--flush', action='store_true',
+                            help='Сначала удалить прошлые данные bench_*.')
+
+    def handle(self, *args, **options):
+        exists = User.objects.filter(
+            username__startswith=bench.BENCH_PREFIX
+        ).exists()
+        if exists and not options['flush']:
+            raise CommandError(
+                'Данные bench_* уже есть: запустите с --flush.'
+            )
+        if exists:
+            bench.flush(options['batch_size'])
+        bench.seed(
+            users=options['users'],
+            posts=options['posts'],
+            groups=options['groups'],
+            follows=options['follows'],
+            skew=options['skew'],
+            batch_size=options['batch_size'],
+            feed_backfill=options['feed_backfill'],
+            random_seed=options['seed'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS('Данные для бенчмарка готовы'))
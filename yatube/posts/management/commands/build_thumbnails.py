@@ -0,0 +1,43 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Post
+from posts.thumbnails import (LocalQueue, ProcessQueue, build_thumbnails,
+                              missing_sizes)
+
+
+class Command(BaseCommand):
+    help = ('Строит миниатюры для уже загруженных картинок постов, у '
+            'которых их ещё нет: такие посты иначе навсегда с заглушкой.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2,
+                            help='Процессов сборки; 0 — в этом процессе.')
+        parser.add_argument('--force', action='store_true',
+                            help='Пересобрать и уже готовые миниатюры.')
+
+    def handle(self, *args, **options):
+        names = (Post.objects.exclude(image='').order_by()
+                 .values_list('image', flat=True).distinct().iterator())
+        pending = [name for name in names
+                   if options['force'] or missing_sizes(name)]
+        if not pending:
+            self.stdout.write('Все миниатюры уже построены')
+            return
+        queue = (ProcessQueue(options['workers']) if options['workers'] > 0
+                 else LocalQueue())
+        futures = {queue.submit(build_thumbnails, name): name
+                   for name in pending}
+        failed = 0
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                failed += 1
+                self.stderr.write(
+                    f'{futures[future]}: {future.exception()}'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок: {len(pending)}, построено {len(pending) - failed}'
+        ))
+        if failed:
+            raise CommandError(f'Не построено: {failed}')
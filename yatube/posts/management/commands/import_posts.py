@@ -0,0 +1,53 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import PostImporter
+from posts.models import ImportProgress
+
+
+class Command(BaseCommand):
+    help = ('Импортирует посты из JSONL или CSV пачками через bulk_create. '
+            'Прерванный импорт продолжается с сохранённой записи.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .csv.')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            help='Формат, если не ясен из расширения.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--images-dir',
+                            help='Каталог, от которого считаются пути image.')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Потоков для копирования картинок.')
+        parser.add_argument('--create-authors', action='store_true')
+        parser.add_argument('--create-groups', action='store_true')
+        parser.add_argument('--source',
+                            help='Ключ прогресса импорта, по умолчанию '
+                                 'абсолютный путь файла.')
+        parser.add_argument('--restart', action='store_true',
+                            help='Начать сначала, забыв о прошлом запуске.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        source = options['source'] or os.path.abspath(path)
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        if options['restart']:
+            ImportProgress.objects.filter(source=source).delete()
+        importer = PostImporter(
+            batch_size=options['batch_size'],
+            images_dir=options['images_dir'],
+            workers=options['workers'],
+            create_authors=options['create_authors'],
+            create_groups=options['create_groups'],
+            log=self.stdout.write,
+        )
+        try:
+            elapsed = importer.run(path, source, options['format'])
+        except FileNotFoundError as error:
+            raise CommandError(error)
+        rate = importer.imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано {importer.imported}, пропущено '
+            f'{importer.skipped} за {elapsed:.1f} с ({rate:.0f} постов/с)'
+        ))
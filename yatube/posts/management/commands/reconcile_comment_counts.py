@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.stats import reconcile_comments
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает comment_count и last_commented_at постов по '
+            'таблице комментариев.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = reconcile_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено постов: {fixed}')
+        )
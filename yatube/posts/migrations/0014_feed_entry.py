@@ -0,0 +1,88 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# значения настроек на момент миграции: повторный прогон не должен
+# зависеть от того, какими FEED_* станут потом
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL_SIZE = 200
+FEED_BATCH_SIZE = 500
+
+
+def materialize_feeds(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    FeedEntry = apps.get_model('posts', 'FeedEntry')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    counts = models.Count('id')
+    for row in Follow.objects.values('author_id').annotate(total=counts):
+        AuthorStats.objects.create(
+            author_id=row['author_id'], follower_count=row['total']
+        )
+        if row['total'] >= FEED_FANOUT_LIMIT:
+            continue
+        posts = list(
+            Post.objects.filter(author_id=row['author_id']).order_by(
+                '-created', '-id'
+            ).values_list('id', 'created')[:FEED_BACKFILL_SIZE]
+        )
+        follower_ids = Follow.objects.filter(
+            author_id=row['author_id']
+        ).values_list('user_id', flat=True)
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(user_id=user_id, post_id=post_id,
+                          author_id=row['author_id'], created=created)
+                for user_id in follower_ids
+                for post_id, created in posts
+            ],
+            batch_size=FEED_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('follower_count', models.PositiveIntegerField(default=0, verbose_name='Количество подписчиков')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(verbose_name='Дата создания поста')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-created'], name='feed_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', 'author'], name='feed_user_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(materialize_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+def count_posts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    totals = Post.objects.order_by().values('author_id').annotate(
+        total=models.Count('id')
+    )
+    for row in totals:
+        AuthorStats.objects.update_or_create(
+            author_id=row['author_id'],
+            defaults={'post_count': row['total']},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_feed_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество постов'),
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:15
+
+from django.db import migrations, models
+
+
+def drop_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    keep = Follow.objects.order_by().values('user_id', 'author_id').annotate(
+        first_id=models.Min('id')
+    ).values('first_id')
+    Follow.objects.exclude(id__in=keep).delete()
+    totals = Follow.objects.order_by().values('author_id').annotate(
+        total=models.Count('id')
+    )
+    for row in totals:
+        AuthorStats.objects.filter(author_id=row['author_id']).update(
+            follower_count=row['total']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_follows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:27
+
+from django.db import migrations
+
+SQLITE_CREATE = (
+    "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+    "text, tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO posts_post_fts (rowid, text) SELECT id, text FROM posts_post",
+)
+SQLITE_DROP = ('DROP TABLE IF EXISTS posts_post_fts',)
+POSTGRES_CREATE = (
+    "CREATE INDEX post_text_search_idx ON posts_post "
+    "USING GIN (to_tsvector('russian', text))",
+)
+POSTGRES_DROP = ('DROP INDEX IF EXISTS post_text_search_idx',)
+
+
+def run(statements):
+    def execute(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, ()):
+            schema_editor.execute(sql)
+    return execute
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_follow_unique_constraint'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}),
+            run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}),
+        ),
+    ]
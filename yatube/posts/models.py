@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import connections, models, transaction
 from django.contrib.auth import get_user_model
 
 from core.models import CreatedModel
@@ -24,6 +24,20 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    # ровно то, что выводят карточка (includes/description.html) и ссылки
+    # лент; остальное, включая пароль автора, не выбирается
+    FEED_FIELDS = (
+        'text', 'created', 'image', 'comment_count',
+        'author', 'author__username', 'author__first_name',
+        'author__last_name',
+        'group', 'group__slug',
+    )
+
+    def for_feed(self):
+        return self.select_related('author', 'group').only(*self.FEED_FIELDS)
+
+
 class Post(CreatedModel):
     text = models.TextField(
         verbose_name='Текст вашего поста'
@@ -49,13 +63,49 @@ class Post(CreatedModel):
         blank=True,
         help_text='image',
     )
+    # меняются через F() при добавлении и удалении комментария
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
+    last_commented_at = models.DateTimeField(
+        'Дата последнего комментария',
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
-    @property
-    def amount_author_post(self):
-        return self.author.posts.all().count()
+    objects = PostQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # имя картинки из базы: миниатюры строятся, только если оно сменилось
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # счётчики автора обновляются в post_save внутри этой же транзакции
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('created', 'id'),
+                name='post_created_id_idx',
+            ),
+            models.Index(
+                fields=('author', 'created', 'id'),
+                name='post_author_created_idx',
+            ),
+            models.Index(
+                fields=('group', 'created', 'id'),
+                name='post_group_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:15]
@@ -78,9 +128,20 @@ class Comment(CreatedModel):
     )
     text = models.TextField()
 
+    def save(self, *args, **kwargs):
+        # счётчик поста обновляется в post_save внутри этой же транзакции
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'comment'
         verbose_name_plural = 'comments'
+        indexes = (
+            models.Index(
+                fields=('post', 'created', 'id'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self):
         comment_text = self.text[:20]
@@ -91,6 +152,39 @@ class Comment(CreatedModel):
         return self.author.username
 
 
+class FollowQuerySet(models.QuerySet):
+    def _execute(self, sql, params):
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def follow(self, user, author):
+        """Подписка одним INSERT без проверки exists().
+
+        Повтор гасится уникальным ограничением. Возвращает True, если
+        строка действительно добавлена.
+        """
+        ops = connections[self.db].ops
+        table = ops.quote_name(self.model._meta.db_table)
+        columns = ', '.join(map(ops.quote_name, ('user_id', 'author_id')))
+        sql = (
+            f'{ops.insert_statement(ignore_conflicts=True)} {table} '
+            f'({columns}) VALUES (%s, %s) '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+        )
+        return self._execute(sql, [user.pk, author.pk]) == 1
+
+    def unfollow(self, user, author):
+        """Отписка одним DELETE; True, если подписка существовала."""
+        ops = connections[self.db].ops
+        table = ops.quote_name(self.model._meta.db_table)
+        sql = (
+            f'DELETE FROM {table} WHERE {ops.quote_name("user_id")} = %s '
+            f'AND {ops.quote_name("author_id")} = %s'
+        )
+        return self._execute(sql, [user.pk, author.pk]) > 0
+
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -102,3 +196,84 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following'
     )
+
+    objects = FollowQuerySet.as_manager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    created = models.DateTimeField('Дата создания поста')
+
+    class Meta:
+        ordering = ('-created',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_feed_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', 'created', 'post'),
+                name='feed_user_created_idx',
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='feed_user_author_idx',
+            ),
+        )
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора, которые дорого считать на лету."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    follower_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+    )
+    post_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+    )
+
+
+class ImportProgress(models.Model):
+    """Сколько записей источника импорта уже обработано.
+
+    Пишется в одной транзакции с пачкой постов: падение между коммитом и
+    сохранением прогресса не приведёт к повторному импорту пачки.
+    """
+    source = models.CharField('Источник', max_length=255, unique=True)
+    done = models.PositiveIntegerField('Обработано записей', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    def __str__(self):
+        return f'{self.source}: {self.done}'
@@ -0,0 +1,218 @@
+"""Полнотекстовый поиск по постам.
+
+В SQLite слова лежат в таблице FTS5 posts_post_fts, её синхронизируют
+сигналы сохранения и удаления поста. В PostgreSQL используется GIN-индекс
+по выражению to_tsvector, который база поддерживает сама. На остальных
+СУБД поиск вырождается в LIKE. Выдача упорядочена по score (чем меньше,
+тем релевантнее) и id, страницы листаются курсором по этой паре.
+"""
+import re
+
+from django.db import connection
+
+from .models import Post
+from .utilits import (CURSOR_NEXT, CURSOR_PREVIOUS, CursorPage,
+                      decode_cursor, encode_cursor)
+
+FTS_TABLE = 'posts_post_fts'
+# должно совпадать с выражением индекса в миграции 0019
+SEARCH_CONFIG = 'russian'
+MAX_TERMS = 10
+REBUILD_BATCH_SIZE = 500
+
+WORD_RE = re.compile(r'\w+')
+
+
+def terms(query):
+    """Слова запроса без операторов и кавычек: их не нужно экранировать."""
+    return WORD_RE.findall(query.lower())[:MAX_TERMS]
+
+
+class SQLiteSearch:
+    def matches(self, words):
+        match = ' '.join(f'"{word}"*' for word in words)
+        return (
+            f'SELECT rowid AS id, rank AS score FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s',
+            [match],
+        )
+
+    def index(self, posts):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                               [[post.pk] for post in posts])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [[post.pk, post.text] for post in posts],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                           [post_id])
+
+    def rebuild(self, post_ids=None):
+        with connection.cursor() as cursor:
+            if post_ids is None:
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                    f'SELECT id, text FROM {Post._meta.db_table}'
+                )
+                return
+            post_ids = list(post_ids)
+            # пачками: у SQLite ограничено число параметров запроса
+            for start in range(0, len(post_ids), REBUILD_BATCH_SIZE):
+                chunk = post_ids[start:start + REBUILD_BATCH_SIZE]
+                marks = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({marks})', chunk
+                )
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                    f'SELECT id, text FROM {Post._meta.db_table} '
+                    f'WHERE id IN ({marks})',
+                    chunk,
+                )
+
+
+class PostgresSearch:
+    def matches(self, words):
+        # конфигурация подставлена литералом, иначе индекс не подойдёт
+        vector = f"to_tsvector('{SEARCH_CONFIG}', text)"
+        return (
+            f'SELECT id, -ts_rank({vector}, query) AS score '
+            f'FROM {Post._meta.db_table}, '
+            f"to_tsquery('{SEARCH_CONFIG}', %s) query "
+            f'WHERE {vector} @@ query',
+            [' & '.join(f'{word}:*' for word in words)],
+        )
+
+    def index(self, posts):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self, post_ids=None):
+        pass
+
+
+class LikeSearch(PostgresSearch):
+    def matches(self, words):
+        condition = ' AND '.join(['LOWER(text) LIKE %s'] * len(words))
+        return (
+            f'SELECT id, 0 AS score FROM {Post._meta.db_table} '
+            f'WHERE {condition}',
+            [f'%{word}%' for word in words],
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearch(),
+    'postgresql': PostgresSearch(),
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, LikeSearch())
+
+
+def index_post(post):
+    get_backend().index([post])
+
+
+def index_posts(posts):
+    """Индексирует пачку постов, записанных в обход сигналов."""
+    get_backend().index(posts)
+
+
+def remove_post(post_id):
+    get_backend().remove(post_id)
+
+
+def rebuild(post_ids=None):
+    """Переиндексирует посты после загрузки в обход сигналов.
+
+    post_ids ограничивает переиндексацию: удалённые посты из этого списка
+    уходят из индекса, остальные индексируются заново. Без него — все.
+    """
+    get_backend().rebuild(post_ids)
+
+
+def filter_posts(queryset, query):
+    """Сужает queryset до постов, подходящих под запрос, без ранжирования."""
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    sql, params = get_backend().matches(words)
+    # pk__in=RawSQL(...) даёт IN ((SELECT ...)), и SQLite берёт из такого
+    # подзапроса только первую строку
+    return queryset.extra(
+        where=[f'{Post._meta.db_table}.id IN (SELECT id FROM ({sql}) hits)'],
+        params=params,
+    )
+
+
+class SearchPaginator:
+    """Выдача поиска по релевантности с курсором по ключу (score, id)."""
+
+    def __init__(self, query, per_page):
+        self.words = terms(query)
+        self.per_page = int(per_page)
+
+    def _hits(self, score, pk, forward):
+        sql, params = get_backend().matches(self.words)
+        seek = ''
+        if score is not None:
+            worse, older = ('>', '<') if forward else ('<', '>')
+            seek = (f'WHERE score {worse} %s '
+                    f'OR (score = %s AND id {older} %s) ')
+            params = params + [score, score, pk]
+        order = 'score, id DESC' if forward else 'score DESC, id'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id, score FROM ({sql}) hits {seek}'
+                f'ORDER BY {order} LIMIT %s',
+                params + [self.per_page + 1],
+            )
+            rows = cursor.fetchall()
+        return rows[:self.per_page], len(rows) > self.per_page
+
+    def _posts(self, rows):
+        found = Post.objects.for_feed().in_bulk(
+            [pk for pk, _ in rows]
+        )
+        posts = []
+        # индекс может ссылаться на пост, удалённый в обход сигналов
+        for pk, score in rows:
+            if pk in found:
+                found[pk].search_score = score
+                posts.append(found[pk])
+        return posts
+
+    def get_page(self, cursor):
+        if not self.words:
+            return CursorPage([], self, '')
+        decoded = decode_cursor(cursor)
+        if decoded is None or not isinstance(decoded[1], (int, float)):
+            decoded, cursor = None, ''
+        forward = decoded is None or decoded[0] == CURSOR_NEXT
+        score, pk = decoded[1:] if decoded else (None, None)
+        rows, has_more = self._hits(score, pk, forward)
+        if not forward:
+            rows.reverse()
+        if not rows:
+            return CursorPage([], self, cursor)
+        (first_id, first_score), (last_id, last_score) = rows[0], rows[-1]
+        has_next = has_more if forward else True
+        has_previous = decoded is not None if forward else has_more
+        return CursorPage(
+            self._posts(rows), self, cursor,
+            next_cursor=(encode_cursor(CURSOR_NEXT, last_score, last_id)
+                         if has_next else None),
+            previous_cursor=(
+                encode_cursor(CURSOR_PREVIOUS, first_score, first_id)
+                if has_previous else None
+            ),
+        )
@@ -0,0 +1,132 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import feed, search, stats, thumbnails
+from .cache import (bump_author_version, bump_comment_feeds,
+                    bump_comment_version, bump_feed_version,
+                    bump_post_version, invalidate_object)
+from .models import Comment, Follow, Group, Post, User
+
+# поля автора, которые выводятся в лентах
+AUTHOR_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        stats.change_counter(instance.author_id, 'post_count', 1)
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def build_thumbnails(sender, instance, update_fields, **kwargs):
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    name = instance.image.name
+    if name and name != getattr(instance, '_loaded_image', None):
+        transaction.on_commit(partial(thumbnails.enqueue, name))
+    instance._loaded_image = name
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    stats.change_counter(instance.author_id, 'post_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_cached_object(sender, instance, **kwargs):
+    invalidate_object(instance)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_card(sender, instance, created, **kwargs):
+    if not created:
+        bump_post_version(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(sender, instance, created, update_fields,
+                            **kwargs):
+    if author_name_changed(created, update_fields):
+        bump_author_version(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_feed(sender, **kwargs):
+    bump_feed_version()
+
+
+def author_name_changed(created, update_fields):
+    """Могло ли сохранение User поменять имя в карточках его постов.
+
+    Вход пишет только last_login: на каждый логин ленты не сбрасываются.
+    """
+    if created:
+        return False
+    return update_fields is None or bool(AUTHOR_FIELDS & set(update_fields))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feeds(sender, instance, created, update_fields,
+                            **kwargs):
+    if author_name_changed(created, update_fields):
+        bump_feed_version()
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        stats.comment_added(instance.post_id, instance.created)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    stats.comment_removed(instance.post_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    bump_comment_version(instance.post_id)
+    # число комментариев выводится в карточке поста на всех лентах
+    bump_post_version(instance.post_id)
+    post = instance._state.fields_cache.get('post')
+    if post is None:
+        # при каскаде от удаления поста строки уже нет: ленты сбросит он сам
+        post = Post.objects.filter(pk=instance.post_id).first()
+    if post is not None:
+        bump_comment_feeds(post)
+
+
+# представления подписываются через Follow.objects.follow()/unfollow(),
+# минуя сигналы; эти обработчики покрывают ORM, админку и каскады
+@receiver(post_save, sender=Follow)
+def backfill_follow(sender, instance, created, **kwargs):
+    if created:
+        feed.followed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def purge_follow(sender, instance, **kwargs):
+    feed.unfollowed(instance.user_id, instance.author_id)
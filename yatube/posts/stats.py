@@ -0,0 +1,139 @@
+"""Денормализованные счётчики автора (AuthorStats) и комментариев поста.
+
+Счётчики сдвигаются через F() в той же транзакции, что и изменение
+исходных строк, а расхождения чинят команды reconcile_author_stats и
+reconcile_comment_counts.
+"""
+from django.db.models import (Count, DateTimeField, F, Max, OuterRef,
+                              Subquery, Value)
+from django.db.models.functions import Coalesce, Greatest
+
+from .cache import invalidate_object
+from .models import AuthorStats, Comment, Follow, Post
+
+
+def recount(author_id):
+    return {
+        'follower_count': Follow.objects.filter(author_id=author_id).count(),
+        'post_count': Post.objects.filter(author_id=author_id).count(),
+    }
+
+
+def change_counter(author_id, field, delta):
+    """Сдвигает счётчик и возвращает новое значение.
+
+    Если строки статистики ещё нет, она создаётся пересчётом. При удалении
+    строка не создаётся: автор может удаляться каскадом в этой же транзакции.
+    """
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        **{field: F(field) + delta}
+    )
+    if not updated:
+        if delta < 0:
+            return None
+        AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults=recount(author_id)
+        )
+    return AuthorStats.objects.filter(author_id=author_id).values_list(
+        field, flat=True
+    ).first()
+
+
+def author_stats(author):
+    """Статистика автора; если она не подгружена select_related — создаётся."""
+    try:
+        return author.stats
+    except AuthorStats.DoesNotExist:
+        stats, _ = AuthorStats.objects.get_or_create(
+            author_id=author.pk, defaults=recount(author.pk)
+        )
+        return stats
+
+
+def reconcile():
+    """Пересчитывает все счётчики; возвращает число исправленных строк."""
+    posts = dict(
+        Post.objects.order_by().values_list('author_id').annotate(
+            total=Count('id')
+        )
+    )
+    followers = dict(
+        Follow.objects.order_by().values_list('author_id').annotate(
+            total=Count('id')
+        )
+    )
+    fixed = 0
+    for author_id in set(posts) | set(followers):
+        expected = {
+            'post_count': posts.get(author_id, 0),
+            'follower_count': followers.get(author_id, 0),
+        }
+        stats, created = AuthorStats.objects.get_or_create(
+            author_id=author_id, defaults=expected
+        )
+        if created:
+            fixed += 1
+            continue
+        if any(getattr(stats, name) != value
+               for name, value in expected.items()):
+            AuthorStats.objects.filter(pk=stats.pk).update(**expected)
+            fixed += 1
+    fixed += AuthorStats.objects.exclude(
+        author_id__in=Post.objects.values('author_id')
+    ).exclude(
+        author_id__in=Follow.objects.values('author_id')
+    ).exclude(post_count=0, follower_count=0).update(
+        post_count=0, follower_count=0
+    )
+    return fixed
+
+
+def _last_comment():
+    return Subquery(
+        Comment.objects.filter(post_id=OuterRef('pk')).order_by(
+            '-created'
+        ).values('created')[:1]
+    )
+
+
+def comment_added(post_id, created):
+    created = Value(created, output_field=DateTimeField())
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + 1,
+        last_commented_at=Greatest(Coalesce('last_commented_at', created),
+                                   created),
+    )
+    # update() обходит сигналы, а пост лежит в кэше объектов
+    invalidate_object(Post(pk=post_id))
+
+
+def comment_removed(post_id):
+    Post.objects.filter(pk=post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        last_commented_at=_last_comment(),
+    )
+    invalidate_object(Post(pk=post_id))
+
+
+def reconcile_comments():
+    """Пересчитывает счётчики комментариев; возвращает число исправленных."""
+    totals = {
+        post_id: (total, last)
+        for post_id, total, last in Comment.objects.order_by().values_list(
+            'post_id'
+        ).annotate(total=Count('id'), last=Max('created'))
+    }
+    stored = Post.objects.order_by().values_list(
+        'id', 'comment_count', 'last_commented_at'
+    )
+    # сначала дочитываем выборку: SQLite не любит запись под открытым курсором
+    wrong = [
+        post_id for post_id, count, last in stored.iterator()
+        if (count, last) != totals.get(post_id, (0, None))
+    ]
+    for post_id in wrong:
+        count, last = totals.get(post_id, (0, None))
+        Post.objects.filter(pk=post_id).update(comment_count=count,
+                                               last_commented_at=last)
+        invalidate_object(Post(pk=post_id))
+    return len(wrong)
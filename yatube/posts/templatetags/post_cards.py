@@ -0,0 +1,22 @@
+from django import template
+
+from ..cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def prefetch_cards(posts):
+    """Достаёт карточки страницы разом; {% post_card %} возьмёт готовые."""
+    cards = render_cards(posts)
+    for post in posts:
+        post.card_html = cards[post.id]
+    return ''
+
+
+@register.simple_tag
+def post_card(post):
+    html = getattr(post, 'card_html', None)
+    if html is None:
+        return render_cards([post])[post.id]
+    return html
@@ -0,0 +1,14 @@
+from django import template
+from django.conf import settings
+from sorl.thumbnail import default
+
+register = template.Library()
+
+
+@register.simple_tag
+def prebuilt_thumbnail(image, size):
+    """Готовая миниатюра размера из THUMBNAIL_SIZES или None."""
+    if not image:
+        return None
+    geometry, options = settings.THUMBNAIL_SIZES[size]
+    return default.backend.get_prebuilt(image, geometry, **dict(options))
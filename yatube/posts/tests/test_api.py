@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..feed import follow
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_AMOUNT=2)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='mobile')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='api-group',
+                                         description='Описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {number}',
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        for number in range(3):
+            Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                                   text=f'Комментарий {number}')
+        follow(cls.reader, cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url, **params):
+        texts, cursor = [], None
+        while True:
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            texts += [row['text'] for row in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                return texts
+
+    def test_feeds_walk_all_pages_newest_first(self):
+        newest_first = [post.text for post in reversed(self.posts)]
+        feeds = {
+            reverse('posts:api_index'): newest_first,
+            reverse('posts:api_profile', args=['mobile']): newest_first,
+            reverse('posts:api_group', args=['api-group']): [
+                'Пост 3', 'Пост 1'
+            ],
+        }
+        for url, expected in feeds.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(url), expected)
+
+    def test_follow_feed_requires_login(self):
+        url = reverse('posts:api_follow')
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.client.force_login(self.reader)
+        self.assertEqual(len(self.walk(url)), 5)
+
+    def test_fields_limit_columns_and_joins(self):
+        with self.assertNumQueries(1) as queries:
+            data = self.client.get(reverse('posts:api_index'),
+                                   {'fields': 'id,text'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        self.assertNotIn('JOIN', queries.captured_queries[0]['sql'])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('posts:api_index'),
+                                   {'fields': 'text,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_post_detail_and_comments(self):
+        post = self.posts[0]
+        data = self.client.get(
+            reverse('posts:api_post_detail', args=[post.id])
+        ).json()
+        self.assertEqual((data['author'], data['text']),
+                         ('mobile', 'Пост 0'))
+
+        texts = self.walk(reverse('posts:api_comments', args=[post.id]))
+        self.assertEqual(texts, [f'Комментарий {n}' for n in range(3)])
+
+    def test_image_url_comes_from_storage(self):
+        post = self.posts[1]
+        # update() обходит сигналы: файл для проверки адреса не нужен
+        Post.objects.filter(pk=post.pk).update(image='posts/фото 1.gif')
+        data = self.client.get(
+            reverse('posts:api_post_detail', args=[post.id])
+        ).json()
+        self.assertEqual(data['image'],
+                         '/media/posts/%D1%84%D0%BE%D1%82%D0%BE%201.gif')
+
+    def test_missing_objects_are_json_404(self):
+        urls = (
+            reverse('posts:api_post_detail', args=[0]),
+            reverse('posts:api_comments', args=[0]),
+            reverse('posts:api_profile', args=['nobody']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'error': 'not found'})
@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from .. import bench, search, stats
+from ..models import AuthorStats, Comment, FeedEntry, Follow, Group, Post
+
+User = get_user_model()
+
+
+class BenchScopeTests(TestCase):
+    def test_seed_and_flush_keep_other_feeds_and_index(self):
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='writer')
+        Follow.objects.create(user=reader, author=author)
+        for number in range(3):
+            Post.objects.create(author=author, text=f'Настоящий {number}')
+        entries = set(FeedEntry.objects.values_list('user_id', 'post_id'))
+
+        bench.seed(users=10, posts=30, groups=1, follows=2, batch_size=10,
+                   feed_backfill=1, log=lambda message: None)
+        self.assertTrue(entries < set(
+            FeedEntry.objects.values_list('user_id', 'post_id')
+        ))
+        bench.flush()
+
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('user_id', 'post_id')), entries
+        )
+        self.assertEqual(search.filter_posts(
+            Post.objects.all(), 'Настоящий'
+        ).count(), 3)
+
+
+class BenchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        bench.seed(users=20, posts=60, groups=2, follows=3, batch_size=25,
+                   log=lambda message: None)
+
+    def test_seed_keeps_derived_data_consistent(self):
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('post_count', flat=True)), 60
+        )
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list(
+                'follower_count', flat=True)),
+            Follow.objects.count(),
+        )
+        self.assertTrue(FeedEntry.objects.exists())
+
+    def test_run_reports_every_scenario(self):
+        report = bench.run(concurrency=1, duration=60,
+                           requests=len(bench.SCENARIOS) * 10)
+        self.assertEqual(report['total']['requests'],
+                         len(bench.SCENARIOS) * 10)
+        self.assertEqual(report['total']['errors'], 0)
+        for row in report['views'].values():
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+            self.assertIsNotNone(row['queries_per_request'])
+
+    def test_compare_flags_query_growth(self):
+        previous = {'views': {'index': {'p95_ms': 10, 'rps': 100,
+                                        'queries_per_request': 4}}}
+        current = {'views': {'index': {'p95_ms': 10, 'rps': 100,
+                                       'queries_per_request': 5}}}
+        self.assertEqual(bench.compare(previous, current),
+                         [('index', 'queries_per_request', 4, 5)])
+
+    def test_flush_removes_bench_rows_without_signals(self):
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.filter(
+            slug__startswith=bench.BENCH_SLUG_PREFIX
+        ).first()
+        own = Post.objects.create(author=reader, text='Свой', group=group)
+        bench_user = User.objects.filter(
+            username__startswith=bench.BENCH_PREFIX
+        ).first()
+        Comment.objects.create(post=own, author=bench_user, text='Чужой')
+        Follow.objects.create(user=reader, author=bench_user)
+
+        with mock.patch.object(search, 'remove_post') as remove_post, \
+                mock.patch.object(stats, 'change_counter') as change_counter:
+            bench.flush()
+        remove_post.assert_not_called()
+        change_counter.assert_not_called()
+
+        self.assertFalse(User.objects.filter(
+            username__startswith=bench.BENCH_PREFIX
+        ).exists())
+        self.assertFalse(Group.objects.filter(
+            slug__startswith=bench.BENCH_SLUG_PREFIX
+        ).exists())
+        self.assertEqual(list(Post.objects.all()), [own])
+        own.refresh_from_db()
+        self.assertIsNone(own.group_id)
+        self.assertEqual(own.comment_count, 0)
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(
+            list(AuthorStats.objects.values_list(
+                'author_id', 'post_count', 'follower_count')),
+            [(reader.id, 1, 0)],
+        )
+        self.assertEqual(list(search.filter_posts(Post.objects.all(),
+                                                  'Свой')), [own])
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import cards
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='carded',
+                                              first_name='Карл')
+        cls.post = Post.objects.create(author=cls.author, text='Карточка')
+
+    def setUp(self):
+        cache.clear()
+
+    def profile(self):
+        return self.client.get(
+            reverse('posts:profile', kwargs={'username': 'carded'})
+        )
+
+    def test_cards_are_rendered_once(self):
+        with mock.patch.object(cards, 'render_card',
+                               wraps=cards.render_card) as render:
+            self.profile()
+            self.profile()
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(render.call_count, 1)
+
+    def test_card_follows_post_author_and_comments(self):
+        self.assertContains(self.profile(), 'Карточка')
+
+        Post.objects.filter(pk=self.post.pk).update(text='Устаревшая')
+        self.assertContains(self.profile(), 'Карточка')
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленная'
+        post.save()
+        self.assertContains(self.profile(), 'Исправленная')
+
+        User.objects.filter(pk=self.author.pk).update(first_name='Клара')
+        User.objects.get(pk=self.author.pk).save()
+        self.assertContains(self.profile(), 'Клара')
+
+        Comment.objects.create(post=post, author=self.author, text='Ок')
+        self.assertContains(
+            self.profile(),
+            '<span class="post_article">Комментариев:</span> 1',
+            html=False,
+        )
+
+    def test_card_versions_reach_index_and_group(self):
+        group = Group.objects.create(title='Карточная', slug='carded')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        urls = (reverse('posts:index'),
+                reverse('posts:group_list', kwargs={'slug': 'carded'}))
+        for url in urls:
+            self.assertContains(self.client.get(url), 'Карл')
+
+        User.objects.filter(pk=self.author.pk).update(first_name='Клара')
+        User.objects.get(pk=self.author.pk).save()
+        Comment.objects.create(post=self.post, author=self.author, text='Ок')
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Клара')
+                self.assertContains(
+                    response,
+                    '<span class="post_article">Комментариев:</span> 1',
+                )
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Обновлённая'
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Обновлённая')
+
+    def test_index_and_group_pages_come_from_fragment(self):
+        group = Group.objects.create(title='Фрагмент', slug='fragment')
+        Post.objects.create(author=self.author, group=group, text='В группе')
+        urls = (reverse('posts:index'),
+                reverse('posts:group_list', kwargs={'slug': 'fragment'}))
+        for url in urls:
+            self.client.get(url)
+        with mock.patch('posts.templatetags.post_cards.render_cards') as cards:
+            for url in urls:
+                with self.subTest(url=url):
+                    self.assertContains(self.client.get(url), 'В группе')
+        cards.assert_not_called()
+
+    def test_every_feed_uses_card_cache(self):
+        self.profile()
+        with mock.patch.object(cards, 'render_card') as render:
+            for url in (reverse('posts:index'),
+                        reverse('posts:search') + '?q=Карточка'):
+                with self.subTest(url=url):
+                    self.client.get(url)
+        render.assert_not_called()
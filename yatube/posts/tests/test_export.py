@@ -0,0 +1,102 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='exporter')
+        cls.other = User.objects.create_user(username='stranger')
+        cls.staff = User.objects.create_user(username='admin', is_staff=True)
+        cls.post = Post.objects.create(author=cls.author, text='Свой пост')
+        Post.objects.create(author=cls.other, text='Чужой пост')
+        Comment.objects.create(post=cls.post, author=cls.other,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.author, author=cls.other)
+
+    def streamed(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_requires_login(self):
+        response = self.client.get(reverse('posts:export', args=['posts']))
+        self.assertEqual(response.status_code, 302)
+
+    def test_user_gets_only_own_rows_as_ndjson(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:export', args=['posts']))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        records = [json.loads(line)
+                   for line in self.streamed(response).splitlines()]
+        self.assertEqual([record['text'] for record in records],
+                         ['Свой пост'])
+        self.assertEqual(records[0]['author__username'], 'exporter')
+
+    def test_staff_exports_whole_site_as_csv(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse('posts:export', args=['posts']),
+            {'format': 'csv', 'scope': 'all'},
+        )
+        rows = list(csv.DictReader(StringIO(self.streamed(response))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['text'], 'Свой пост')
+
+    def test_csv_cells_are_not_formulas(self):
+        texts = ['=HYPERLINK("http://evil")', '+1', '-1', '@SUM(A1)',
+                 'Обычный текст']
+        for text in texts:
+            Post.objects.create(author=self.author, text=text)
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:export', args=['posts']),
+                                   {'format': 'csv'})
+        rows = list(csv.DictReader(StringIO(self.streamed(response))))
+        self.assertEqual(
+            [row['text'] for row in rows[1:]],
+            ["'" + text for text in texts[:4]] + ['Обычный текст'],
+        )
+
+    def test_unknown_kind_or_format_is_404(self):
+        self.client.force_login(self.author)
+        for kind, params in (('users', {}), ('posts', {'format': 'xml'})):
+            with self.subTest(kind=kind, params=params):
+                response = self.client.get(
+                    reverse('posts:export', args=[kind]), params
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_command_writes_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'follows.ndjson')
+        call_command('export_data', 'follows', '--user', 'exporter',
+                     '--output', path, '--chunk-size', '1')
+
+        with open(path, encoding='utf-8') as output:
+            records = [json.loads(line) for line in output]
+        self.assertEqual(records, [{
+            'id': Follow.objects.get().id,
+            'user__username': 'exporter',
+            'author__username': 'stranger',
+        }])
+
+    def test_command_streams_comments_to_stdout(self):
+        out = StringIO()
+        call_command('export_data', 'comments', stdout=out)
+        self.assertIn('Комментарий', out.getvalue())
@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import get_template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import test_views
+from .. import bench
+from ..fastcards import PostCard, as_cards, render_card
+from ..feed import follow
+from ..models import Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PAGE_AMOUNT=2)
+class FastCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='fast', first_name='Имя <b>', last_name='Фамилия'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Быстрая', slug='fast-group',
+                                         description='Описание')
+        cls.plain = Post.objects.create(
+            author=cls.author, text='Строка <script>\nвторая & третья'
+        )
+        cls.pictured = Post.objects.create(
+            author=cls.author, group=cls.group, text='С картинкой',
+            image=SimpleUploadedFile('fast.gif', SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+        Post.objects.create(author=cls.author, text='Третий')
+        follow(cls.reader, cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rows_become_slotted_cards(self):
+        card = as_cards(Post.objects.filter(pk=self.pictured.pk)).get()
+        self.assertIsInstance(card, PostCard)
+        self.assertFalse(hasattr(card, '__dict__'))
+        self.assertEqual((card.pk, card.group.slug, str(card.author)),
+                         (self.pictured.pk, 'fast-group', 'fast'))
+
+    def test_fast_card_matches_template(self):
+        template = get_template('includes/description.html')
+        for post in Post.objects.for_feed():
+            card = as_cards(Post.objects.filter(pk=post.pk)).get()
+            with self.subTest(text=post.text):
+                self.assertHTMLEqual(render_card(card),
+                                     template.render({'post': post}))
+
+    @override_settings(FAST_FEED=True)
+    def test_feeds_work_on_fast_path(self):
+        self.client.force_login(self.reader)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'fast-group'}),
+            reverse('posts:profile', kwargs={'username': 'fast'}),
+            reverse('posts:index_follow'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIsInstance(response.context['page_obj'][0],
+                                      PostCard)
+
+        response = self.client.get(reverse('posts:index_follow'),
+                                   {'cursor': ''})
+        texts = [card.text for card in response.context['page_obj']]
+        response = self.client.get(
+            reverse('posts:index_follow'),
+            {'cursor': response.context['page_obj'].next_cursor},
+        )
+        texts += [card.text for card in response.context['page_obj']]
+        self.assertEqual(len(set(texts)), 3)
+
+    def test_card_cost_reports_both_paths(self):
+        report = bench.card_cost(pages=2)
+        self.assertEqual(set(report), {'models', 'tuples', 'saved_pct'})
+        self.assertGreater(report['models']['page_ms'], 0)
+
+
+def fast_feed(case):
+    """Тесты представлений из test_views, но с FAST_FEED."""
+    return override_settings(FAST_FEED=True)(
+        type(f'Fast{case.__name__}', (case,), {'__module__': __name__})
+    )
+
+
+FastPostPagesTests = fast_feed(test_views.PostPagesTests)
+FastFollowingTests = fast_feed(test_views.FollowingTests)
+FastCursorPaginationTests = fast_feed(test_views.CursorPaginationTests)
+FastGroupFeedTests = fast_feed(test_views.GroupFeedTests)
+FastCommentPaginationTests = fast_feed(test_views.CommentPaginationTests)
+FastQueryBudgetTests = fast_feed(test_views.QueryBudgetTests)
+FastConditionalGetTests = fast_feed(test_views.ConditionalGetTests)
+FastFeedProjectionTests = fast_feed(test_views.FeedProjectionTests)
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+
+from ..feed import follow, follow_feed, unfollow
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(author=cls.author, text='old')
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='new')
+        self.assertEqual(
+            set(FeedEntry.objects.filter(user=self.reader).values_list(
+                'post_id', flat=True)),
+            {self.old_post.id, new_post.id},
+        )
+        self.assertEqual(list(follow_feed(self.reader)[0]),
+                         [new_post, self.old_post])
+
+    def test_unfollow_purges_feed(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(list(follow_feed(self.reader)[0]), [])
+        self.assertEqual(self.author.stats.follower_count, 0)
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_popular_author_is_pulled_on_read(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='new')
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(list(follow_feed(self.reader)[0]),
+                         [new_post, self.old_post])
+
+
+class FollowStatementTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='followed')
+        cls.reader = User.objects.create_user(username='follower')
+
+    def test_repeated_follow_is_single_insert(self):
+        follow(self.reader, self.author)
+        with self.assertNumQueries(1):
+            follow(self.reader, self.author)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.author.stats.follower_count, 1)
+
+    def test_unfollow_without_follow_is_single_delete(self):
+        with self.assertNumQueries(1):
+            unfollow(self.reader, self.author)
+        follow(self.reader, self.author)
+        unfollow(self.reader, self.author)
+        self.assertFalse(Follow.objects.exists())
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.follower_count, 0)
+
+    def test_duplicate_follow_rows_are_rejected(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
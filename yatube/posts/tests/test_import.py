@@ -0,0 +1,223 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import search
+from ..importer import PostImporter
+from ..models import (AuthorStats, FeedEntry, Follow, Group, ImportProgress,
+                      Post)
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='imported',
+                                         description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source_dir, ignore_errors=True)
+
+    def write_jsonl(self, records, name='posts.jsonl'):
+        path = os.path.join(self.source_dir, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            for record in records:
+                source.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def import_file(self, path, **options):
+        options.setdefault('batch_size', 2)
+        importer = PostImporter(log=lambda message: None, **options)
+        importer.run(path)
+        return importer
+
+    def test_jsonl_import_keeps_derived_data_consistent(self):
+        path = self.write_jsonl([
+            {'author': 'writer', 'text': 'Импортированный текст',
+             'group': 'imported', 'created': '2020-01-02T03:04:05+00:00'},
+            {'author': 'writer', 'text': 'Второй импортированный'},
+            {'author': 'writer', 'text': 'Третий импортированный'},
+        ])
+        importer = self.import_file(path)
+
+        self.assertEqual(importer.imported, 3)
+        posts = Post.objects.filter(author=self.author)
+        self.assertEqual(posts.count(), 3)
+        first = posts.get(text='Импортированный текст')
+        self.assertEqual(first.group, self.group)
+        self.assertEqual(first.created.year, 2020)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).post_count, 3
+        )
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.reader).count(), 3
+        )
+        self.assertEqual(
+            search.filter_posts(Post.objects.all(), 'импортированный')
+            .count(), 3
+        )
+
+    def test_csv_import_skips_invalid_rows(self):
+        path = os.path.join(self.source_dir, 'posts.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as source:
+            source.write('author,text,group\n'
+                         'writer,Из CSV,\n'
+                         'nobody,Чужой,\n'
+                         'writer,Без группы,missing\n'
+                         'writer,,\n')
+        importer = self.import_file(path)
+
+        self.assertEqual((importer.imported, importer.skipped), (1, 3))
+        self.assertTrue(Post.objects.filter(text='Из CSV').exists())
+
+    def test_missing_authors_and_groups_are_created_on_request(self):
+        path = self.write_jsonl([
+            {'author': 'newcomer', 'text': 'Новенький', 'group': 'fresh'},
+        ])
+        self.import_file(path, create_authors=True, create_groups=True)
+
+        post = Post.objects.get(text='Новенький')
+        self.assertEqual(post.author.username, 'newcomer')
+        self.assertEqual(post.group.slug, 'fresh')
+
+    def test_images_are_copied_into_media(self):
+        with open(os.path.join(self.source_dir, 'small.gif'), 'wb') as image:
+            image.write(SMALL_GIF)
+        path = self.write_jsonl([
+            {'author': 'writer', 'text': 'С картинкой', 'image': 'small.gif'},
+            {'author': 'writer', 'text': 'Потерянная', 'image': 'lost.gif'},
+        ])
+        self.import_file(path, images_dir=self.source_dir)
+
+        post = Post.objects.get(text='С картинкой')
+        self.assertTrue(post.image.name.startswith('posts/'))
+        self.assertTrue(os.path.exists(post.image.path))
+        self.assertFalse(Post.objects.get(text='Потерянная').image)
+
+    def test_images_outside_images_dir_are_rejected(self):
+        images_dir = os.path.join(self.source_dir, 'images')
+        os.mkdir(images_dir)
+        secret = os.path.join(self.source_dir, 'secret.gif')
+        with open(secret, 'wb') as image:
+            image.write(SMALL_GIF)
+        with open(os.path.join(images_dir, 'fake.gif'), 'w') as fake:
+            fake.write('SECRET_KEY = "x"')
+        path = self.write_jsonl([
+            {'author': 'writer', 'text': 'Абсолютный', 'image': secret},
+            {'author': 'writer', 'text': 'Выше', 'image': '../secret.gif'},
+            {'author': 'writer', 'text': 'Не картинка', 'image': 'fake.gif'},
+        ])
+        importer = self.import_file(path, images_dir=images_dir)
+
+        self.assertEqual((importer.imported, importer.skipped), (1, 2))
+        self.assertFalse(Post.objects.filter(
+            text__in=['Абсолютный', 'Выше']
+        ).exists())
+        self.assertFalse(Post.objects.get(text='Не картинка').image)
+        for name in ('secret.gif', 'fake.gif'):
+            self.assertFalse(os.path.exists(
+                os.path.join(TEMP_MEDIA_ROOT, 'posts', name)
+            ))
+
+    def test_images_need_images_dir(self):
+        with open(os.path.join(self.source_dir, 'small.gif'), 'wb') as image:
+            image.write(SMALL_GIF)
+        path = self.write_jsonl([
+            {'author': 'writer', 'text': 'Без каталога',
+             'image': os.path.join(self.source_dir, 'small.gif')},
+        ])
+        importer = self.import_file(path)
+
+        self.assertEqual((importer.imported, importer.skipped), (0, 1))
+
+    def test_interrupted_import_resumes_from_state(self):
+        path = self.write_jsonl([
+            {'author': 'writer', 'text': f'Пост {number}'}
+            for number in range(5)
+        ])
+        ImportProgress.objects.create(source=os.path.abspath(path), done=3)
+        self.import_file(path)
+
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4'],
+        )
+        self.import_file(path)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_failed_batch_keeps_progress_and_posts_together(self):
+        path = self.write_jsonl([
+            {'author': 'writer', 'text': f'Пост {number}'}
+            for number in range(4)
+        ])
+        with mock.patch.object(search, 'index_posts',
+                               side_effect=[None, RuntimeError]):
+            with self.assertRaises(RuntimeError):
+                self.import_file(path)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            ImportProgress.objects.get(source=os.path.abspath(path)).done, 2
+        )
+        self.import_file(path)
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_source_dates_do_not_change_auto_now_add(self):
+        path = self.write_jsonl([
+            {'author': 'writer', 'text': 'Старый',
+             'created': '2019-05-06T07:08:09+00:00'},
+        ])
+        self.import_file(path)
+        self.assertEqual(Post.objects.get(text='Старый').created.year, 2019)
+        self.assertTrue(Post._meta.get_field('created').auto_now_add)
+        post = Post.objects.create(author=self.author, text='Новый',
+                                   created=timezone.now().replace(year=2000))
+        self.assertEqual(post.created.year, timezone.now().year)
+
+    def test_only_imported_posts_are_fanned_out(self):
+        old = Post.objects.create(author=self.author, text='До импорта')
+        FeedEntry.objects.filter(post=old).delete()
+        path = self.write_jsonl([{'author': 'writer', 'text': 'Новый'}])
+        self.import_file(path)
+        self.assertEqual(
+            list(FeedEntry.objects.filter(user=self.reader)
+                 .values_list('post__text', flat=True)),
+            ['Новый'],
+        )
+
+    def test_command_reports_throughput(self):
+        path = self.write_jsonl([{'author': 'writer', 'text': 'Командой'}])
+        out = StringIO()
+        call_command('import_posts', path, '--restart', stdout=out)
+
+        self.assertIn('Импортировано 1', out.getvalue())
+        self.assertIn('постов/с', out.getvalue())
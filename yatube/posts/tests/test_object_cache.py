@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase
+
+from ..cache import (get_cached, get_cached_or_404, get_post_or_404,
+                     object_key)
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ObjectCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='cached')
+        cls.group = Group.objects.create(title='Кэш', slug='cached')
+        cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Из кэша')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_lookup_skips_database(self):
+        get_cached(User, username='cached')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached(User, username='cached'),
+                             self.author)
+            # строка кладётся под всеми ключами модели сразу
+            self.assertEqual(get_cached(User, id=self.author.id),
+                             self.author)
+
+    def test_user_row_is_cached_without_secrets(self):
+        get_cached(User, username='cached')
+        row = cache.get(object_key(User, 'id', self.author.id))
+        self.assertEqual(row.username, 'cached')
+        for name in ('password', 'email', 'last_login'):
+            with self.subTest(name=name):
+                self.assertNotIn(name, row.__dict__)
+
+    def test_post_warms_author_and_group(self):
+        with self.assertNumQueries(1):
+            get_post_or_404(self.post.id)
+        with self.assertNumQueries(0):
+            post = get_post_or_404(self.post.id)
+            self.assertEqual(post.author.username, 'cached')
+            self.assertEqual(post.group.title, 'Кэш')
+
+    def test_missing_object_is_cached_until_created(self):
+        with self.assertRaises(Http404):
+            get_cached_or_404(Group, slug='later')
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            get_cached_or_404(Group, slug='later')
+        group = Group.objects.create(title='Позже', slug='later')
+        self.assertEqual(get_cached(Group, slug='later'), group)
+
+    def test_save_and_delete_invalidate(self):
+        get_cached(Group, slug='cached')
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        self.assertEqual(get_cached(Group, slug='cached').title,
+                         'Новое название')
+        group.delete()
+        self.assertIsNone(get_cached(Group, slug='cached'))
+
+    def test_renamed_user_is_not_served_by_old_name(self):
+        get_cached(User, username='cached')
+        user = User.objects.get(pk=self.author.pk)
+        user.username = 'renamed'
+        user.save()
+        self.assertIsNone(get_cached(User, username='cached'))
+        self.assertEqual(get_cached(User, username='renamed'), user)
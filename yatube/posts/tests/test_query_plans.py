@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # на пустых таблицах PostgreSQL всегда выбирает seq scan
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+        else:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [' '.join(map(str, row)) for row in cursor.fetchall()]
+
+
+def sorts_without_index(plan):
+    if connection.vendor == 'postgresql':
+        return any(
+            line.strip().lstrip('->').strip().startswith(('Sort ', 'Sort\t'))
+            for line in plan
+        )
+    return any('USE TEMP B-TREE FOR' in line and 'ORDER BY' in line
+               for line in plan)
+
+
+class QueryPlanTests(TestCase):
+    """Все упорядоченные выборки лент читаются по индексу, без filesort."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='planned')
+        cls.reader = User.objects.create_user(username='plan_reader')
+        cls.group = Group.objects.create(title='План', slug='plan')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='План'
+        )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='!')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def ordered_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, params)
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'ORDER BY' in query['sql']
+        ]
+
+    def test_views_use_index_for_ordering(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:index_follow'),
+        )
+        for url in urls:
+            for params in (None, {'cursor': ''}):
+                for sql in self.ordered_queries(url, params):
+                    with self.subTest(url=url, params=params, sql=sql):
+                        plan = explain(sql)
+                        self.assertFalse(sorts_without_index(plan), plan)
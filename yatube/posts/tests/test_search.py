@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..search import SearchPaginator, filter_posts
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='searcher')
+        cls.weak = Post.objects.create(
+            author=cls.author, text='Котики и длинный текст про погоду'
+        )
+        cls.strong = Post.objects.create(
+            author=cls.author, text='Котики, котики, котики!'
+        )
+        cls.other = Post.objects.create(author=cls.author, text='Собаки')
+
+    def test_results_are_ranked(self):
+        page = SearchPaginator('котики', 10).get_page(None)
+        self.assertEqual(list(page), [self.strong, self.weak])
+
+    def test_prefix_and_case_insensitive_match(self):
+        page = SearchPaginator('КОТ', 10).get_page(None)
+        self.assertEqual(len(page), 2)
+
+    def test_index_follows_edit_and_delete(self):
+        other = Post.objects.get(pk=self.other.pk)
+        other.text = 'Котики вместо собак'
+        other.save()
+        self.assertEqual(len(SearchPaginator('котики', 10).get_page('')), 3)
+        self.assertFalse(SearchPaginator('собаки', 10).get_page(''))
+        Post.objects.filter(pk=self.strong.pk).delete()
+        self.assertEqual(len(SearchPaginator('котики', 10).get_page('')), 2)
+
+    def test_cursor_walks_forward_and_back(self):
+        paginator = SearchPaginator('котики', 1)
+        first = paginator.get_page(None)
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(list(second), [self.weak])
+        self.assertFalse(second.has_next())
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual(list(back), [self.strong])
+        self.assertFalse(back.has_previous())
+
+    def test_operators_in_query_are_ignored(self):
+        page = SearchPaginator('"котики* (', 10).get_page(None)
+        self.assertEqual(len(page), 2)
+
+    @override_settings(PAGE_AMOUNT=1)
+    def test_search_view_keeps_query_in_cursor_links(self):
+        response = Client().get(reverse('posts:search'), {'q': 'котики'})
+        self.assertEqual(list(response.context['page_obj']), [self.strong])
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82%D0%B8%D0%BA%D0%B8'
+                                      '&amp;cursor=')
+
+    def test_admin_search_uses_index(self):
+        self.assertEqual(
+            set(filter_posts(Post.objects.all(), 'собаки')), {self.other}
+        )
+        admin = User.objects.create_superuser('root', 'root@example.com',
+                                              'password')
+        client = Client()
+        client.force_login(admin)
+        response = client.get('/admin/posts/post/', {'q': 'собаки'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.other])
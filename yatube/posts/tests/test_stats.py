@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Post
+
+User = get_user_model()
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='counted')
+        cls.post = Post.objects.create(author=cls.author, text='первый')
+        Post.objects.create(author=cls.author, text='второй')
+
+    def test_counter_follows_create_and_delete(self):
+        self.assertEqual(self.author.stats.post_count, 2)
+        Post.objects.filter(text='второй').delete()
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.post_count, 1)
+
+    def test_pages_do_not_count_posts(self):
+        urls = (
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.context['post_amount'], 2)
+                self.assertFalse(
+                    [q for q in queries if 'COUNT(' in q['sql'].upper()]
+                )
+
+    def test_reconcile_fixes_drift(self):
+        AuthorStats.objects.filter(author=self.author).update(post_count=7)
+        call_command('reconcile_author_stats', stdout=StringIO())
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.post_count, 2)
+
+
+class CommentCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='commented')
+        cls.post = Post.objects.create(author=cls.author, text='обсуждаемый')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def comment(self, text):
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': text},
+        )
+
+    def test_count_follows_add_and_delete(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        self.client.get(url)
+        self.comment('первый')
+        self.comment('второй')
+        # страница поста берёт пост из кэша объектов: он должен обновиться
+        self.assertEqual(self.client.get(url).context['post'].comment_count,
+                         2)
+        last = Comment.objects.get(text='второй')
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.last_commented_at, last.created)
+
+        last.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(post.last_commented_at,
+                         Comment.objects.get(text='первый').created)
+
+    def test_edit_does_not_overwrite_count(self):
+        self.client.get(
+            reverse('posts:edit', kwargs={'post_id': self.post.id})
+        )
+        self.comment('пока редактировали')
+        self.client.post(
+            reverse('posts:edit', kwargs={'post_id': self.post.id}),
+            {'text': 'исправленный'},
+        )
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 1)
+
+    def test_reconcile_fixes_drift(self):
+        self.comment('настоящий')
+        Post.objects.filter(pk=self.post.pk).update(comment_count=5,
+                                                    last_commented_at=None)
+        out = StringIO()
+        call_command('reconcile_comment_counts', stdout=out)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.comment_count, 1)
+        self.assertIsNotNone(post.last_commented_at)
+        self.assertIn('1', out.getvalue())
@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post
+from ..thumbnails import (build_thumbnails, enqueue, get_queue, LocalQueue,
+                          missing_sizes)
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+PLACEHOLDER = 'img/thumbnail-placeholder.svg'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PrebuiltThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='painter')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='С картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_show_placeholder_until_thumbnail_is_built(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), PLACEHOLDER)
+
+        build_thumbnails(self.post.image.name)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertNotContains(response, PLACEHOLDER)
+                self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+    @override_settings(THUMBNAIL_QUEUE='posts.thumbnails.LocalQueue',
+                       THUMBNAIL_QUEUE_OPTIONS={})
+    def test_local_queue_stands_in_for_worker_pool(self):
+        self.assertIsInstance(get_queue(), LocalQueue)
+
+    def test_only_new_image_is_enqueued(self):
+        post = Post.objects.get(pk=self.post.pk)
+        with mock.patch('posts.signals.transaction.on_commit',
+                        side_effect=lambda func: func()), \
+                mock.patch.object(thumbnails, 'enqueue') as enqueued:
+            post.text = 'Только текст'
+            post.save()
+            enqueued.assert_not_called()
+            post.image = SimpleUploadedFile('other.gif', SMALL_GIF,
+                                            content_type='image/gif')
+            post.save()
+        enqueued.assert_called_once_with(post.image.name)
+
+    @override_settings(THUMBNAIL_QUEUE='posts.thumbnails.LocalQueue',
+                       THUMBNAIL_QUEUE_OPTIONS={}, THUMBNAIL_RETRIES=2)
+    def test_failed_build_is_logged_and_retried(self):
+        with mock.patch.object(thumbnails, 'build_thumbnails',
+                               side_effect=OSError('битый файл')), \
+                mock.patch.object(thumbnails.threading, 'Timer') as timer:
+            with self.assertLogs('posts.thumbnails', 'WARNING') as logs:
+                enqueue('broken.gif')
+            timer.assert_called_once_with(
+                settings.THUMBNAIL_RETRY_DELAY, enqueue, ['broken.gif', 2]
+            )
+            self.assertIn('битый файл', logs.output[0])
+
+            with self.assertLogs('posts.thumbnails', 'ERROR'):
+                enqueue('broken.gif', attempt=2)
+            self.assertEqual(timer.call_count, 1)
+
+    def test_backfill_command_builds_missing_thumbnails(self):
+        name = self.post.image.name
+        self.assertTrue(missing_sizes(name))
+        out = StringIO()
+        call_command('build_thumbnails', '--workers', '0', stdout=out)
+        self.assertEqual(missing_sizes(name), [])
+        self.assertIn('построено 1', out.getvalue())
+
+        out = StringIO()
+        call_command('build_thumbnails', '--workers', '0', stdout=out)
+        self.assertIn('уже построены', out.getvalue())
@@ -9,14 +9,19 @@ from django.urls import reverse
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 
-from ..models import Post, Group, Follow
+from core.testing import QueryBudgetMixin
+
+from ..models import Comment, Post, Group, Follow
 
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -59,11 +64,11 @@ class PostPagesTests(TestCase):
             reverse("posts:create"): "posts/create_post.html",
             reverse(
                 "posts:post_detail",
-                kwargs={"post_id": PostPagesTests.last_post_id},
+                kwargs={"post_id": cls.last_post_id},
             ): "posts/post_details.html",
             reverse(
                 "posts:edit",
-                kwargs={"post_id": PostPagesTests.last_post_id},
+                kwargs={"post_id": cls.last_post_id},
             ): "posts/create_post.html",
             reverse(
                 "posts:profile",
@@ -86,15 +91,15 @@ class PostPagesTests(TestCase):
         for (
             reverse_name,
             template,
-        ) in PostPagesTests.templates_pages_names.items():
+        ) in self.templates_pages_names.items():
             with self.subTest(reverse_name=reverse_name):
                 response = self.authorized_client.get(reverse_name)
                 self.assertTemplateUsed(response, template)
 
     def test_paginator_and_sorting_by_pubdate(self):
         FIELDS = (
-            PostPagesTests.last_post_id,
-            f"Пост №{PostPagesTests.last_post_id}",
+            self.last_post_id,
+            f"Пост №{self.last_post_id}",
             self.user,
             self.group,
         )
@@ -141,13 +146,13 @@ class PostPagesTests(TestCase):
         response = self.client.get(
             reverse(
                 "posts:post_detail",
-                kwargs={"post_id": PostPagesTests.last_post_id},
+                kwargs={"post_id": self.last_post_id},
             )
         )
         obj = response.context["post"]
         fields = {
-            obj.id: PostPagesTests.last_post_id,
-            obj.text: f"Пост №{PostPagesTests.last_post_id}",
+            obj.id: self.last_post_id,
+            obj.text: f"Пост №{self.last_post_id}",
             obj.author: self.user,
             obj.group: self.group,
         }
@@ -176,14 +181,26 @@ class PostPagesTests(TestCase):
 
     def test_cache_on_page(self):
         response_one = self.authorized_client.get(reverse('posts:index'))
-        Post.objects.create(text='Cache check', author=self.user)
+        Post.objects.filter(id=self.last_post_id).update(
+            text='Изменено в обход сигналов'
+        )
         response_two = self.authorized_client.get(reverse('posts:index'))
-        cache.clear()
+        Post.objects.create(text='Cache check', author=self.user)
         response_three = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(response_one.content, response_two.content,
                          'Кэширование не работает')
         self.assertNotEqual(response_two.content, response_three.content,
-                            'Не кэшируются страница')
+                            'Новый пост не сбрасывает кэш страницы')
+        self.assertContains(response_three, 'Cache check')
+
+    def test_cache_does_not_leak_edit_links(self):
+        cache.clear()
+        self.authorized_client.get(reverse('posts:index'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(
+            response,
+            reverse('posts:edit', kwargs={'post_id': self.last_post_id}),
+        )
 
     def test_img_on_pages(self):
         cache.clear()
@@ -279,3 +296,316 @@ class FollowingTests(TestCase):
             'posts:index_follow'))
         object = response.context['page_obj']
         self.assertEqual(len(object), 0)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor')
+        Post.objects.bulk_create([
+            Post(text=f'Пост №{i}', author=cls.user)
+            for i in range(settings.POST_PAGE_AMOUNT)
+        ])
+        cls.ordered_ids = list(
+            Post.objects.order_by('-created', '-id').values_list(
+                'id', flat=True)
+        )
+
+    def test_cursor_walks_feed_forward_and_back(self):
+        url = reverse('posts:index')
+        first = self.client.get(url, {'cursor': ''}).context['page_obj']
+        self.assertEqual([post.id for post in first],
+                         self.ordered_ids[:settings.PAGE_AMOUNT])
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+        second = self.client.get(
+            url, {'cursor': first.next_cursor}).context['page_obj']
+        self.assertEqual([post.id for post in second],
+                         self.ordered_ids[settings.PAGE_AMOUNT:])
+        self.assertFalse(second.has_next())
+
+        back = self.client.get(
+            url, {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual([post.id for post in back],
+                         self.ordered_ids[:settings.PAGE_AMOUNT])
+        self.assertFalse(back.has_previous())
+
+    def test_cursor_page_does_not_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'), {'cursor': ''})
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()]
+        )
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse('posts:index'),
+                                   {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.context['page_obj'][0].id,
+                         self.ordered_ids[0])
+
+
+class GroupFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='grouped')
+        cls.group = Group.objects.create(title='Группа', slug='grouped')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        Post.objects.bulk_create(
+            [Post(text=f'В группе {i}', author=cls.user, group=cls.group)
+             for i in range(settings.POST_PAGE_AMOUNT)]
+            + [Post(text='Чужой пост', author=cls.user, group=cls.other_group),
+               Post(text='Без группы', author=cls.user)]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_group_feed_contains_only_group_posts(self):
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        posts = list(self.client.get(url).context['page_obj'])
+        posts += list(self.client.get(url, {'page': 2}).context['page_obj'])
+        self.assertEqual(len(posts), settings.POST_PAGE_AMOUNT)
+        self.assertTrue(all(post.group == self.group for post in posts))
+
+    def test_group_feed_query_count_is_bounded(self):
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        # группа, COUNT(*) пагинатора и одна страница постов с JOIN
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        # группа уже в кэше, остаётся только страница
+        with self.assertNumQueries(1):
+            self.client.get(url, {'cursor': ''})
+
+
+@override_settings(COMMENT_PAGE_AMOUNT=3)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='commented')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        commenters = [
+            User.objects.create_user(username=f'reader{i}') for i in range(7)
+        ]
+        for commenter in commenters:
+            Comment.objects.create(post=cls.post, author=commenter,
+                                   text=f'от {commenter.username}')
+        cls.url = reverse('posts:post_detail',
+                          kwargs={'post_id': cls.post.id})
+
+    def test_comments_are_paginated_oldest_first(self):
+        comments = self.client.get(self.url).context['comments']
+        self.assertEqual([c.text for c in comments],
+                         ['от reader0', 'от reader1', 'от reader2'])
+        comments = self.client.get(
+            self.url, {'comments': comments.next_cursor}
+        ).context['comments']
+        self.assertEqual([c.text for c in comments],
+                         ['от reader3', 'от reader4', 'от reader5'])
+
+    def test_comments_newest_first(self):
+        comments = self.client.get(
+            self.url, {'comments_order': 'new'}
+        ).context['comments']
+        self.assertEqual([c.text for c in comments],
+                         ['от reader6', 'от reader5', 'от reader4'])
+
+    def test_post_detail_query_count_is_fixed(self):
+        # пост с автором, статистикой и группой и одна страница комментариев
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Бюджеты SQL на представление: ловят N+1 при росте данных."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='budget_author')
+        cls.reader = User.objects.create_user(username='budget_reader')
+        cls.group = Group.objects.create(title='Бюджет', slug='budget')
+        for i in range(settings.POST_PAGE_AMOUNT):
+            post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text=f'Пост {i}')
+            Comment.objects.create(post=post, author=cls.reader, text='!')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = post
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_views_stay_within_query_budget(self):
+        budgets = {
+            reverse('posts:index'): 4,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 5,
+            reverse('posts:profile', kwargs={'username': self.author}): 5,
+            reverse('posts:post_detail',
+                    kwargs={'post_id': self.post.id}): 4,
+            reverse('posts:index_follow'): 5,
+            reverse('posts:create'): 3,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.reader_client, url, budget)
+
+    def test_metrics_headers_and_summary(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.reader_client.get(reverse('posts:index'))
+        self.assertEqual(int(response['X-Query-Count']), len(queries))
+        self.assertIn('X-Template-Time-Ms', response)
+        self.assertIn('X-Cache-Misses', response)
+
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.reader_client.force_login(staff)
+        summary = self.reader_client.get(
+            reverse('core:request_metrics')
+        ).json()
+        self.assertGreaterEqual(summary['posts:index']['requests'], 1)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='etag_author')
+        cls.reader = User.objects.create_user(username='etag_reader')
+        cls.group = Group.objects.create(title='ETag', slug='etag')
+        cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Не изменился')
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.author}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def revalidate(self, url):
+        etag = self.client.get(url)['ETag']
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_rendered(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertIsNone(response.context)
+
+    def test_new_post_changes_every_etag(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        Post.objects.create(author=self.author, group=self.group, text='Ещё')
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_and_follow_change_their_pages(self):
+        post_url, profile_url = self.urls[3], self.urls[2]
+        post_etag = self.client.get(post_url)['ETag']
+        profile_etag = self.client.get(profile_url)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader, text='!')
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author})
+        )
+        self.assertEqual(self.client.get(
+            post_url, HTTP_IF_NONE_MATCH=post_etag).status_code, 200)
+        self.assertEqual(self.client.get(
+            profile_url, HTTP_IF_NONE_MATCH=profile_etag).status_code, 200)
+
+    def test_comment_changes_feed_count(self):
+        feeds = self.urls[:3]
+        etags = [self.client.get(url)['ETag'] for url in feeds]
+        Comment.objects.create(post=self.post, author=self.reader, text='!')
+        for url, etag in zip(feeds, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(
+                    response,
+                    '<span class="post_article">Комментариев:</span> 1',
+                )
+
+    def test_comment_keeps_other_group_and_profile_etags(self):
+        other = User.objects.create_user(username='etag_other')
+        group = Group.objects.create(title='Другая', slug='etag-other')
+        Post.objects.create(author=other, group=group, text='Без комментариев')
+        urls = (reverse('posts:group_list', kwargs={'slug': group.slug}),
+                reverse('posts:profile', kwargs={'username': other}))
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        Comment.objects.create(post=self.post, author=self.reader, text='!')
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_author_rename_changes_feeds(self):
+        feeds = self.urls[:2]
+        etags = [self.client.get(url)['ETag'] for url in feeds]
+        self.author.first_name = 'Переименован'
+        self.author.save()
+        for url, etag in zip(feeds, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Переименован')
+
+    def test_login_keeps_feed_etags(self):
+        self.author.set_password('password')
+        self.author.save()
+        etag = self.client.get(self.urls[0])['ETag']
+        Client().login(username='etag_author', password='password')
+        response = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_viewer(self):
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        response = Client().get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class FeedProjectionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='projected')
+        cls.group = Group.objects.create(title='Проекция', slug='projection',
+                                         description='Длинное описание')
+        Post.objects.create(author=cls.user, group=cls.group, text='Пост')
+        Follow.objects.create(user=cls.user, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_feeds_select_only_rendered_columns(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'projection'}),
+            reverse('posts:profile', kwargs={'username': 'projected'}),
+            reverse('posts:index_follow'),
+            reverse('posts:search') + '?q=Пост',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, 'Пост')
+                feed_sql = [
+                    query['sql'] for query in queries
+                    if 'FROM "posts_post"' in query['sql']
+                    and '"posts_post"."text"' in query['sql']
+                ]
+                self.assertTrue(feed_sql)
+                for sql in feed_sql:
+                    self.assertNotIn('"auth_user"."password"', sql)
+                    self.assertNotIn('"posts_group"."description"', sql)
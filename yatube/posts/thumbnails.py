@@ -0,0 +1,160 @@
+"""Фоновая подготовка миниатюр для Post.image.
+
+После сохранения поста с новой картинкой все размеры из THUMBNAIL_SIZES
+строятся в очереди THUMBNAIL_QUEUE, а шаблоны только ищут готовую миниатюру
+в KV-хранилище sorl и до её появления показывают заглушку. Упавшая сборка
+пишется в лог и повторяется до THUMBNAIL_RETRIES раз с растущей паузой.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils.module_loading import import_string
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from .cache import bump_feed_version, bump_thumbnail_version
+
+logger = logging.getLogger(__name__)
+
+
+class PrebuiltThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который умеет искать миниатюру, не создавая её."""
+
+    def _normalize_options(self, source, options):
+        # те же умолчания, что в ThumbnailBackend.get_thumbnail, иначе имя
+        # файла миниатюры не совпадёт с построенным в фоне
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_prebuilt(self, file_, geometry_string, **options):
+        """Готовая миниатюра или None, если её ещё не построили."""
+        source = ImageFile(file_)
+        options = self._normalize_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        thumbnail = ImageFile(name, default.storage)
+        built = default.kvstore.get(thumbnail)
+        if built is None and hasattr(default.kvstore, 'cache'):
+            # cached_db запоминает промах надолго, и миниатюру, построенную
+            # в другом процессе, этот процесс бы так и не увидел
+            default.kvstore.cache.delete(add_prefix(thumbnail.key))
+        return built
+
+
+def missing_sizes(name):
+    """Размеры из THUMBNAIL_SIZES, которых для файла ещё нет."""
+    return [
+        size for size, (geometry, options) in settings.THUMBNAIL_SIZES.items()
+        if default.backend.get_prebuilt(name, geometry, **dict(options))
+        is None
+    ]
+
+
+def build_thumbnails(name):
+    """Строит все размеры из THUMBNAIL_SIZES для файла из MEDIA_ROOT."""
+    for geometry, options in settings.THUMBNAIL_SIZES.values():
+        default.backend.get_thumbnail(name, geometry, **dict(options))
+    # закэшированные карточки и фрагменты лент всё ещё показывают заглушку
+    bump_thumbnail_version(name)
+    bump_feed_version()
+
+
+def _init_worker():
+    django.setup()
+    # соединения, унаследованные от родителя при fork, использовать нельзя
+    connections.close_all()
+
+
+class LocalQueue:
+    """Заглушка очереди: задача выполняется сразу в текущем процессе."""
+
+    def submit(self, func, *args):
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+
+class ProcessQueue:
+    """Пул процессов: ресайз в Pillow нагружает CPU, потокам мешал бы GIL."""
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._executor = None
+
+    def submit(self, func, *args):
+        if self._executor is None:
+            self._start()
+        try:
+            return self._executor.submit(func, *args)
+        except BrokenProcessPool:
+            # упавший процесс ломает весь пул: заводим новый
+            self._start()
+            return self._executor.submit(func, *args)
+
+    def _start(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker
+        )
+
+
+_queue = None
+
+
+@receiver(setting_changed)
+def reset_queue(setting, **kwargs):
+    global _queue
+    if setting in ('THUMBNAIL_QUEUE', 'THUMBNAIL_QUEUE_OPTIONS'):
+        _queue = None
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        _queue = import_string(settings.THUMBNAIL_QUEUE)(
+            **settings.THUMBNAIL_QUEUE_OPTIONS
+        )
+    return _queue
+
+
+def _check_build(name, attempt, future):
+    error = future.exception()
+    if error is None:
+        return
+    if attempt >= settings.THUMBNAIL_RETRIES:
+        logger.error('Миниатюры %s не построены после %d попыток', name,
+                     attempt, exc_info=error)
+        return
+    delay = settings.THUMBNAIL_RETRY_DELAY * attempt
+    logger.warning('Миниатюры %s не построены (попытка %d), повтор через '
+                   '%.0f с: %s', name, attempt, delay, error)
+    # не из колбэка: его вызывает служебный поток пула процессов
+    timer = threading.Timer(delay, enqueue, [name, attempt + 1])
+    timer.daemon = True
+    timer.start()
+
+
+def enqueue(name, attempt=1):
+    future = get_queue().submit(build_thumbnails, name)
+    future.add_done_callback(partial(_check_build, name, attempt))
+    return future
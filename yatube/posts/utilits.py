@@ -1,10 +1,166 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.paginator import Page, Paginator
 from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+DEFAULT_KEYS = ('created', 'id')
+
+
+def encode_cursor(direction, created, pk):
+    """Упаковывает ключ (created, id) в непрозрачный токен для URL.
+
+    Вместо даты первым ключом может быть число, например релевантность.
+    """
+    if hasattr(created, 'isoformat'):
+        created = created.isoformat()
+    raw = json.dumps([direction, created, pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (direction, created, pk) или None для битого токена."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, created, pk = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if isinstance(created, str):
+        created = parse_datetime(created)
+    elif isinstance(created, bool) or not isinstance(created, (int, float)):
+        created = None
+    if (direction not in (CURSOR_NEXT, CURSOR_PREVIOUS)
+            or created is None or not isinstance(pk, int)):
+        return None
+    return direction, created, pk
+
+
+class CursorPage(Page):
+    """Страница keyset-пагинации: вместо номеров — токены соседних страниц."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, cursor,
+                 next_cursor=None, previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.cursor = cursor or ''
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage {self.cursor or "first"}>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """Пагинация по ключу (created, id) без COUNT(*) и OFFSET.
+
+    Каждая страница — это один запрос по индексу с LIMIT per_page + 1,
+    поэтому время не зависит от глубины страницы и размера таблицы.
+    keys — поля выборки, в которых лежат те же created и id: например,
+    аннотации материализованной ленты, чтобы сортировать по её индексу.
+    descending=False листает от старых записей к новым.
+    """
+
+    def __init__(self, object_list, per_page, keys=DEFAULT_KEYS,
+                 descending=True):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.created_key, self.id_key = keys
+        self.descending = descending
+
+    def get_page(self, cursor):
+        decoded = decode_cursor(cursor)
+        # числовой ключ — токен чужой выдачи, например поиска
+        if decoded is None or not isinstance(decoded[1], datetime):
+            return self._first_page()
+        direction, created, pk = decoded
+        if direction == CURSOR_NEXT:
+            return self._page_after(cursor, created, pk)
+        return self._page_before(cursor, created, pk)
+
+    def _slice(self, queryset):
+        rows = list(queryset[:self.per_page + 1])
+        return rows[:self.per_page], len(rows) > self.per_page
+
+    def _cursor(self, direction, obj):
+        # строки values() — словари с теми же ключами сортировки
+        if isinstance(obj, dict):
+            return encode_cursor(direction, obj[self.created_key],
+                                 obj[self.id_key])
+        return encode_cursor(direction, obj.created, obj.pk)
+
+    def _ordered(self, queryset, forward=True):
+        prefix = '-' if forward == self.descending else ''
+        return queryset.order_by(prefix + self.created_key,
+                                 prefix + self.id_key)
+
+    def _seek(self, created, pk, forward=True):
+        lookup = 'lt' if forward == self.descending else 'gt'
+        return self.object_list.filter(
+            Q(**{f'{self.created_key}__{lookup}': created})
+            | Q(**{self.created_key: created, f'{self.id_key}__{lookup}': pk})
+        )
+
+    def _first_page(self):
+        rows, has_more = self._slice(self._ordered(self.object_list))
+        next_cursor = self._cursor(CURSOR_NEXT, rows[-1]) if has_more else None
+        return CursorPage(rows, self, '', next_cursor=next_cursor)
+
+    def _page_after(self, cursor, created, pk):
+        rows, has_more = self._slice(
+            self._ordered(self._seek(created, pk))
+        )
+        if not rows:
+            return CursorPage(rows, self, cursor)
+        return CursorPage(
+            rows, self, cursor,
+            next_cursor=(self._cursor(CURSOR_NEXT, rows[-1])
+                         if has_more else None),
+            previous_cursor=self._cursor(CURSOR_PREVIOUS, rows[0]),
+        )
+
+    def _page_before(self, cursor, created, pk):
+        rows, has_more = self._slice(
+            self._ordered(self._seek(created, pk, forward=False),
+                          forward=False)
+        )
+        rows.reverse()
+        if not rows:
+            return CursorPage(rows, self, cursor)
+        return CursorPage(
+            rows, self, cursor,
+            next_cursor=self._cursor(CURSOR_NEXT, rows[-1]),
+            previous_cursor=(self._cursor(CURSOR_PREVIOUS, rows[0])
+                             if has_more else None),
+        )
+
 
+def get_page(request, posts, count=None, keys=DEFAULT_KEYS):
+    """Страница ленты: ?page=N — классический Paginator, ?cursor= — keyset.
 
-def get_page(request, posts):
+    Если число объектов уже известно (денормализованный счётчик), его можно
+    передать в count, и Paginator не будет выполнять COUNT(*).
+    """
+    if 'cursor' in request.GET:
+        paginator = CursorPaginator(posts, settings.PAGE_AMOUNT, keys)
+        return paginator.get_page(request.GET.get('cursor'))
 
     paginator = Paginator(posts, settings.PAGE_AMOUNT)
+    if count is not None:
+        paginator.count = count
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
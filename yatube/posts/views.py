@@ -1,36 +1,77 @@
+from urllib.parse import urlencode
 
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, redirect
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-
-from .utilits import get_page
+from django.http import Http404, StreamingHttpResponse
+from django.views.decorators.http import condition
+
+from .cache import (comments_version, feed_version, get_cached_or_404,
+                    get_post_or_404, group_feed_version, page_owner)
+from . import export
+from .etags import group_etag, index_etag, post_etag, profile_etag
+from .fastcards import as_cards
+from .feed import follow, follow_feed, unfollow
+from .search import SearchPaginator
+from .stats import author_stats
+from .utilits import CursorPaginator, get_page
 from .forms import PostForm, CommentForm
 from .models import Group, User, Post, Follow
 
 
+def feed_posts(posts):
+    """Посты ленты моделями или, при FAST_FEED, карточками PostCard."""
+    return as_cards(posts) if settings.FAST_FEED else posts.for_feed()
+
+
+@condition(etag_func=index_etag)
 def index(request):
-    posts = Post.objects.all().select_related('author', 'group')
+    posts = feed_posts(Post.objects.all())
     page_obj = get_page(request, posts)
     context = {
         'page_obj': page_obj,
+        'feed_version': feed_version(),
+        'comments_version': comments_version(),
+        'feed_owner': page_owner(request.user, page_obj),
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
     }
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=group_etag)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.all()
+    group = get_cached_or_404(Group, slug=slug)
+    posts = feed_posts(group.posts.all())
     page_obj = get_page(request, posts)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_version': feed_version(),
+        'group_version': group_feed_version(group.id),
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = SearchPaginator(query, settings.PAGE_AMOUNT).get_page(
+        request.GET.get('cursor')
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@condition(etag_func=profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = get_page(request, posts)
+    author = get_cached_or_404(User, ('stats',), username=username)
+    post_amount = author_stats(author).post_count
+    posts = feed_posts(author.posts.all())
+    page_obj = get_page(request, posts, count=post_amount)
     following = False
     if request.user.is_authenticated and request.user != author:
         following = Follow.objects.filter(
@@ -40,21 +81,33 @@ def profile(request, username):
     context = {
         'page_obj': page_obj,
         'author': author,
-        'following': following
+        'following': following,
+        'post_amount': post_amount,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post_or_404(post_id)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
-    post_amount = post.amount_author_post
+    comments_order = request.GET.get('comments_order', 'old')
+    comments = post.comments.select_related('author').only(
+        'created', 'text', 'post', 'author',
+        'author__username', 'author__first_name', 'author__last_name',
+    )
+    comments = CursorPaginator(
+        comments,
+        settings.COMMENT_PAGE_AMOUNT,
+        descending=comments_order == 'new',
+    ).get_page(request.GET.get('comments'))
+    post_amount = author_stats(post.author).post_count
     context = {
         'post': post,
         'form': form,
         'post_amount': post_amount,
-        'comments': comments
+        'comments': comments,
+        'comments_order': comments_order,
     }
     return render(request, 'posts/post_details.html', context)
 
@@ -76,16 +129,18 @@ def create_post(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_cached_or_404(Post, id=post_id)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post
     )
-    if request.user != post.author:
+    if request.user.id != post.author_id:
         return redirect("posts:post_detail", post_id)
     if form .is_valid():
-        form.save()
+        post = form.save(commit=False)
+        # экземпляр мог прийти из кэша: пишем только поля формы
+        post.save(update_fields=PostForm.Meta.fields)
         return redirect("posts:post_detail", post_id)
     context = {
         'form': form,
@@ -96,7 +151,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_cached_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -109,8 +164,10 @@ def add_comment(request, post_id):
 
 @login_required
 def index_follow(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_page(request, posts)
+    posts, keys = follow_feed(request.user)
+    page_obj = get_page(
+        request, feed_posts(posts), keys=keys
+    )
     context = {
         'page_obj': page_obj
     }
@@ -119,21 +176,33 @@ def index_follow(request):
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if request.user.is_authenticated and request.user != author:
-        if not Follow.objects.filter(
-            author=author,
-            user=request.user
-        ).exists():
-            Follow.objects.create(user=request.user,
-                                  author=author)
+    author = get_cached_or_404(User, username=username)
+    if request.user != author:
+        follow(request.user, author)
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(user=request.user, author=author)
-    if follow.exists():
-        follow.delete()
+    author = get_cached_or_404(User, username=username)
+    unfollow(request.user, author)
     return redirect('posts:profile', username)
+
+
+@login_required
+def export_data(request, kind):
+    fmt = request.GET.get('format', 'ndjson')
+    if kind not in export.EXPORTS or fmt not in export.FORMATS:
+        raise Http404
+    # весь сайт выгружают только сотрудники, остальные — своё
+    user = None
+    if not (request.user.is_staff and request.GET.get('scope') == 'all'):
+        user = request.user
+    response = StreamingHttpResponse(
+        export.lines(kind, fmt, user),
+        content_type=f'{export.FORMATS[fmt]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{fmt}"'
+    )
+    return response
@@ -0,0 +1,23 @@
+"""Профиль настроек выбирается переменной окружения YATUBE_ENV.
+
+dev (по умолчанию) — разработка и тесты: DEBUG, debug_toolbar, проверки
+запросов; prod — боевой режим без отладочных приложений; bench — боевой
+режим с метриками запросов для нагрузочных прогонов.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ('dev', 'prod', 'bench')
+PROFILE = os.environ.get('YATUBE_ENV', 'dev')
+
+if PROFILE == 'dev':
+    from .dev import *  # noqa: F401,F403
+elif PROFILE == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif PROFILE == 'bench':
+    from .bench import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f'YATUBE_ENV={PROFILE!r}: ожидается один из {", ".join(PROFILES)}'
+    )
@@ -0,0 +1,317 @@
+"""
+Django settings for yatube project: общие для всех профилей.
+
+Значения здесь рассчитаны на боевой режим; dev.py и bench.py
+переопределяют то, что отличается. Профиль выбирает yatube/settings/__init__.py.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', ')31x--&@7rq=^x61_9tk16gftibah!w7k5d@b$9=1e*75-3j8v'
+)
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+    'www.wediusse.pythonanywhere.com',
+    'wediusse.pythonanywhere.com',
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',
+    'about.apps.AboutConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'users.apps.UsersConfig',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    "core.apps.CoreConfig",
+    'sorl.thumbnail',
+    'django.contrib.staticfiles',
+
+]
+
+MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        # шаблоны разбираются один раз на процесс; dev.py возвращает
+        # APP_DIRS, чтобы правки шаблонов были видны без перезапуска
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
+        },
+    },
+]
+# wsgi разбирает все шаблоны templates/ при старте воркера
+TEMPLATE_WARMUP = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # отчёт прогрева шаблонов в лог воркера
+        'core.templating': {'handlers': ['console'], 'level': 'INFO'},
+        # упавшие сборки миниатюр и повторы
+        'posts.thumbnails': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+# DB_BACKEND: sqlite (по умолчанию) или postgresql — пул соединений на
+# процесс (core.db.backends.postgresql), параметры из DB_NAME, DB_USER,
+# DB_PASSWORD, DB_HOST, DB_PORT, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT (сколько
+# ждать свободного соединения). Драйвер: requirements-postgres.txt.
+DB_BACKEND = os.environ.get('DB_BACKEND', 'sqlite')
+if DB_BACKEND == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'yatube'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'OPTIONS': {
+                'POOL_MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+                'POOL_TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            # писатели ждут блокировку, а не падают с database is locked
+            'OPTIONS': {'timeout': 20},
+        }
+    }
+
+# выполняются на каждом новом соединении SQLite (core.db)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME':
+        'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME':
+        'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME':
+        'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME':
+        'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Кэш выбирается окружением. CACHE_BACKEND: locmem (по умолчанию, свой у
+# каждого воркера), file, memcached или redis — общие для всех воркеров;
+# CACHE_LOCATION — каталог или адрес сервера. Для redis держится пул
+# соединений на процесс (CACHE_MAX_CONNECTIONS), memcached-клиент Django
+# хранит постоянное соединение в каждом потоке и требует пакет pylibmc
+# (requirements-memcached.txt). CACHE_L1_TIMEOUT > 0 включает
+# двухуровневый режим: L1 в памяти процесса поверх общего L2.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache',
+             os.path.join(BASE_DIR, 'cache')),
+    'memcached': ('django.core.cache.backends.memcached.PyLibMCCache',
+                  '127.0.0.1:11211'),
+    'redis': ('core.cache.backends.RedisCache', 'redis://127.0.0.1:6379/0'),
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_L1_TIMEOUT = float(os.environ.get('CACHE_L1_TIMEOUT', 0))
+
+
+def build_caches(backend, l1_timeout, max_entries=None):
+    """CACHES для бэкенда; max_entries — предел locmem и file."""
+    shared_backend, shared_location = CACHE_BACKENDS[backend]
+    shared = {
+        'BACKEND': shared_backend,
+        'LOCATION': os.environ.get('CACHE_LOCATION', shared_location),
+    }
+    local_options = {'MAX_ENTRIES': max_entries} if max_entries else {}
+    if backend == 'redis':
+        shared['OPTIONS'] = {
+            'MAX_CONNECTIONS': int(
+                os.environ.get('CACHE_MAX_CONNECTIONS', 50)
+            ),
+        }
+    elif backend == 'memcached':
+        shared['OPTIONS'] = {
+            'binary': True,
+            'behaviors': {'tcp_nodelay': True, 'ketama': True},
+        }
+    elif local_options:
+        shared['OPTIONS'] = dict(local_options)
+
+    if not l1_timeout:
+        return {'default': shared}
+    return {
+        'default': {
+            'BACKEND': 'core.cache.backends.TieredCache',
+            'OPTIONS': {
+                'L1': 'local',
+                'L2': 'shared',
+                'L1_TIMEOUT': l1_timeout,
+            },
+        },
+        'local': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'l1',
+            'OPTIONS': local_options,
+        },
+        'shared': shared,
+    }
+
+
+CACHES = build_caches(CACHE_BACKEND, CACHE_L1_TIMEOUT)
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = "ru"
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# указываем директорию, в которую будут складываться файлы писем
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+PAGE_AMOUNT = 10
+
+POST_PAGE_AMOUNT = 15
+TEST_PAGE_NUMBER = 10
+
+# лента подписок: авторы с таким числом подписчиков не раскладываются
+# по лентам при публикации, их посты подмешиваются при чтении
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL_SIZE = 200
+FEED_BATCH_SIZE = 500
+
+# фрагменты лент и карточки постов сбрасываются версией, таймаут лишь
+# ограничивает память
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# ленты строками-кортежами и карточками без шаблонизатора (posts.fastcards)
+FAST_FEED = False
+
+COMMENT_PAGE_AMOUNT = 20
+
+# миниатюры строятся в фоне после сохранения поста, шаблоны их только ищут
+THUMBNAIL_BACKEND = 'posts.thumbnails.PrebuiltThumbnailBackend'
+THUMBNAIL_SIZES = {
+    'card': ('900x339', {'crop': 'center', 'upscale': True}),
+    'detail': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+THUMBNAIL_QUEUE = 'posts.thumbnails.ProcessQueue'
+THUMBNAIL_QUEUE_OPTIONS = {'workers': 2}
+# упавшая сборка повторяется с паузой THUMBNAIL_RETRY_DELAY * номер попытки
+THUMBNAIL_RETRIES = 3
+THUMBNAIL_RETRY_DELAY = 5
+
+# заголовки X-Query-Count и др. и сводка /metrics/ для staff
+REQUEST_METRICS = False
+
+# чтение поля вне only() бросает исключение вместо запроса на строку
+DEFERRED_FIELD_GUARD = False
+
+# read-through кэш строк User, Group и Post; промахи (404) живут меньше
+OBJECT_CACHE_TIMEOUT = 60 * 15
+OBJECT_CACHE_MISS_TIMEOUT = 60
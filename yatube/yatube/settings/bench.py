@@ -0,0 +1,4 @@
+"""Нагрузочные прогоны: боевой профиль плюс заголовки X-Query-Count."""
+from .prod import *  # noqa: F401,F403
+
+REQUEST_METRICS = True
@@ -0,0 +1,30 @@
+"""Разработка и тесты."""
+import copy
+
+from . import base
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
+
+INSTALLED_APPS = base.INSTALLED_APPS + ['debug_toolbar']
+MIDDLEWARE = list(base.MIDDLEWARE)
+MIDDLEWARE.insert(
+    MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+    'debug_toolbar.middleware.DebugToolbarMiddleware',
+)
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+# правки шаблонов видны без перезапуска runserver; копия, чтобы не
+# менять словари base, которые видят и другие профили
+TEMPLATES = copy.deepcopy(base.TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = True
+del TEMPLATES[0]['OPTIONS']['loaders']
+TEMPLATE_WARMUP = False
+
+THUMBNAIL_QUEUE = 'posts.thumbnails.LocalQueue'
+THUMBNAIL_QUEUE_OPTIONS = {}
+
+REQUEST_METRICS = True
+DEFERRED_FIELD_GUARD = True
@@ -0,0 +1,24 @@
+"""Боевой режим: без debug_toolbar, с постоянными соединениями к БД."""
+import copy
+import os
+
+from . import base
+from .base import *  # noqa: F401,F403
+from .base import CACHE_BACKEND, build_caches
+
+DEBUG = False
+
+# соединение живёт между запросами воркера, а не открывается на каждый
+DATABASES = copy.deepcopy(base.DATABASES)
+DATABASES['default']['CONN_MAX_AGE'] = int(
+    os.environ.get('DB_CONN_MAX_AGE', 60)
+)
+
+# locmem и file по умолчанию держат 300 ключей: карточек одной ленты
+# больше, и они вытесняли бы друг друга. Перед общим redis/memcached
+# короткий L1 снимает сетевой запрос с повторных чтений версий.
+CACHE_L1_TIMEOUT = float(os.environ.get(
+    'CACHE_L1_TIMEOUT', 2 if CACHE_BACKEND in ('redis', 'memcached') else 0
+))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 20000))
+CACHES = build_caches(CACHE_BACKEND, CACHE_L1_TIMEOUT, CACHE_MAX_ENTRIES)
@@ -11,15 +11,18 @@ urlpatterns = [
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include(('about.urls', 'about'), namespace='about')),
     path('admin/', admin.site.urls),
+    path('metrics/', include(('core.urls', 'core'), namespace='core')),
 ]
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'
 handler500 = 'core.views.server_error'
 
-if settings.DEBUG:
+if 'debug_toolbar' in settings.INSTALLED_APPS:
     import debug_toolbar
 
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
+
+if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
     )